@@ -1 +1 @@
-__all__ = ["builders_base", "evo_builder", "hc_builder"]
+__all__ = ["builders_base", "evo_builder", "hc_builder", "partition_builder"]
@@ -20,6 +20,9 @@ class ParamDict(TypedDict, total=False):
     remove_init_edges: bool
     white_list: Optional[Tuple[str, str]]
     bl_add: Optional[List[str]]
+    max_parents: Optional[int]
+    candidate_parents: Optional[Dict[str, List[str]]]
+    fixed_edges: Optional[List[Tuple[str, str]]]
 
 
 class StructureBuilder(object):
@@ -217,6 +220,9 @@ class BaseDefiner(VerticesDefiner, EdgesDefiner):
             "remove_init_edges": True,
             "white_list": None,
             "bl_add": None,
+            "max_parents": None,
+            "candidate_parents": None,
+            "fixed_edges": None,
         }
         super().__init__(descriptor, regressor=regressor)
         self.optimizer = None  # will be defined in subclasses
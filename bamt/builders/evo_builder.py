@@ -1,4 +1,5 @@
 from datetime import timedelta
+from functools import partial, update_wrapper
 from typing import Dict, Optional, List, Tuple
 
 from golem.core.adapter import DirectAdapter
@@ -198,8 +199,14 @@ class EvoStructureBuilder(EvoDefiner):
         )
 
         # Define the objective function to optimize
+        objective_metric = self.objective_metric
+        if kwargs.get("score_cache", None) is not None:
+            objective_metric = update_wrapper(
+                partial(objective_metric, score_cache=kwargs["score_cache"]),
+                objective_metric,
+            )
         objective = Objective(
-            {"custom": kwargs.get("custom_metric", self.objective_metric)}
+            {"custom": kwargs.get("custom_metric", objective_metric)}
         )
 
         # Initialize the optimizer
@@ -8,6 +8,7 @@ from bamt.builders.builders_base import ParamDict, BaseDefiner
 from bamt.log import logger_builder
 from bamt.redef_HC import hc as hc_method
 from bamt.utils import GraphUtils as gru
+from bamt.utils.score_cache import ScoreCache, CachedStructureScore
 
 
 class HillClimbDefiner(BaseDefiner):
@@ -32,6 +33,10 @@ class HillClimbDefiner(BaseDefiner):
         progress_bar: bool,
         remove_init_edges: bool,
         white_list: Optional[List[Tuple[str, str]]],
+        score_cache: Optional[ScoreCache] = None,
+        max_parents: Optional[int] = None,
+        candidate_parents: Optional[Dict[str, List[str]]] = None,
+        fixed_edges: Optional[List[Tuple[str, str]]] = None,
     ):
         """
         :param init_edges: list of tuples, a graph to start learning with
@@ -39,6 +44,11 @@ class HillClimbDefiner(BaseDefiner):
         :param data: user's data
         :param progress_bar: verbose regime
         :param white_list: list of allowed edges
+        :param score_cache: family scores shared between searches
+        :param max_parents: maximal number of parents of node, unlimited if None
+        (unlike MI, LL, BIC and AIC, see apply_group1)
+        :param candidate_parents: allowed parents of every node, it narrows white_list
+        :param fixed_edges: edges which are always kept, whatever remove_init_edges is
         """
         if not all([i in ["disc", "disc_num"] for i in gru.nodes_types(data).values()]):
             logger_builder.error(
@@ -53,11 +63,27 @@ class HillClimbDefiner(BaseDefiner):
         else:
             scoring_function = self.scoring_function[1]
 
+        scoring_method = scoring_function(data)
+        if score_cache is not None:
+            scoring_method = CachedStructureScore(scoring_method, score_cache)
+
+        if candidate_parents is not None:
+            candidates = [
+                (u, v) for v, parents in candidate_parents.items() for u in parents
+            ]
+            if white_list is not None:
+                allowed = set(map(tuple, white_list))
+                candidates = [edge for edge in candidates if edge in allowed]
+            white_list = candidates
+
+        fixed_edges = [tuple(edge) for edge in fixed_edges or ()]
         if not init_edges:
             best_model = self.optimizer.estimate(
-                scoring_method=scoring_function(data),
+                scoring_method=scoring_method,
                 black_list=self.black_list,
                 white_list=white_list,
+                max_indegree=max_parents,
+                fixed_edges=fixed_edges,
                 show_progress=progress_bar,
             )
         else:
@@ -67,16 +93,21 @@ class HillClimbDefiner(BaseDefiner):
                 startdag.add_nodes_from(nodes=nodes)
                 startdag.add_edges_from(ebunch=init_edges)
                 best_model = self.optimizer.estimate(
+                    scoring_method=scoring_method,
                     black_list=self.black_list,
                     white_list=white_list,
+                    max_indegree=max_parents,
                     start_dag=startdag,
+                    fixed_edges=fixed_edges,
                     show_progress=False,
                 )
             else:
                 best_model = self.optimizer.estimate(
+                    scoring_method=scoring_method,
                     black_list=self.black_list,
                     white_list=white_list,
-                    fixed_edges=init_edges,
+                    max_indegree=max_parents,
+                    fixed_edges=[tuple(edge) for edge in init_edges] + fixed_edges,
                     show_progress=False,
                 )
 
@@ -90,6 +121,11 @@ class HillClimbDefiner(BaseDefiner):
         init_edges: Optional[List[Tuple[str, str]]],
         remove_init_edges: bool,
         white_list: Optional[List[Tuple[str, str]]],
+        n_jobs: int = 1,
+        score_cache: Optional[ScoreCache] = None,
+        max_parents: Optional[int] = None,
+        candidate_parents: Optional[Dict[str, List[str]]] = None,
+        fixed_edges: Optional[List[Tuple[str, str]]] = None,
     ):
         """
         This method implements the group of scoring functions.
@@ -98,6 +134,14 @@ class HillClimbDefiner(BaseDefiner):
         "LL" - Log Likelihood,
         "BIC" - Bayesian Information Criteria,
         "AIC" - Akaike information Criteria.
+        :param n_jobs: number of processes to score candidate families
+        :param score_cache: family scores shared between searches
+        :param max_parents: maximal number of parents of node, 3 if None (the limit
+        hill climbing always had; unlike K2, see apply_K2)
+        :param candidate_parents: allowed parents of every node (e.g. from
+        MathUtils.mmpc_candidates or BigBraveBN.get_candidate_parents), only
+        they are scored
+        :param fixed_edges: edges which are always kept, whatever remove_init_edges is
         """
         column_name_dict = dict([(n.name, i) for i, n in enumerate(self.vertices)])
         blacklist_new = []
@@ -117,6 +161,21 @@ class HillClimbDefiner(BaseDefiner):
                 init_edges.append(
                     (column_name_dict[pair[0]], column_name_dict[pair[1]])
                 )
+        if fixed_edges:
+            fixed_edges = [
+                (column_name_dict[pair[0]], column_name_dict[pair[1]])
+                for pair in fixed_edges
+            ]
+        if candidate_parents is not None:
+            candidate_parents = dict(
+                [
+                    (
+                        column_name_dict[node],
+                        [column_name_dict[parent] for parent in parents],
+                    )
+                    for node, parents in candidate_parents.items()
+                ]
+            )
 
         bn = hc_method(
             data,
@@ -126,6 +185,11 @@ class HillClimbDefiner(BaseDefiner):
             remove_geo_edges=remove_init_edges,
             black_list=blacklist_new,
             debug=progress_bar,
+            n_jobs=n_jobs,
+            score_cache=score_cache,
+            max_parents=3 if max_parents is None else max_parents,
+            candidate_parents=candidate_parents,
+            fixed_edges=fixed_edges,
         )
         structure = []
         nodes = sorted(list(bn.nodes()))
@@ -179,8 +243,14 @@ class HCStructureBuilder(HillClimbDefiner):
         classifier: Optional[object],
         regressor: Optional[object],
         params: Optional[ParamDict] = None,
+        n_jobs: int = 1,
+        score_cache: Optional[ScoreCache] = None,
         **kwargs,
     ):
+        """
+        :param n_jobs: number of processes to score candidate families (MI, LL, BIC, AIC)
+        :param score_cache: family scores shared between searches
+        """
         if params:
             for param, value in params.items():
                 self.params[param] = value
@@ -193,9 +263,20 @@ class HCStructureBuilder(HillClimbDefiner):
 
         self.restrict(data, init_nodes, bl_add)
         if self.scoring_function[0] == "K2":
-            self.apply_K2(data=data, progress_bar=progress_bar, **self.params)
+            self.apply_K2(
+                data=data,
+                progress_bar=progress_bar,
+                score_cache=score_cache,
+                **self.params,
+            )
         elif self.scoring_function[0] in ["MI", "LL", "BIC", "AIC"]:
-            self.apply_group1(data=data, progress_bar=progress_bar, **self.params)
+            self.apply_group1(
+                data=data,
+                progress_bar=progress_bar,
+                n_jobs=n_jobs,
+                score_cache=score_cache,
+                **self.params,
+            )
 
         # Level 2
 
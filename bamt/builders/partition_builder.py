@@ -0,0 +1,231 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Callable
+
+import numpy as np
+from joblib import Parallel, delayed
+from pandas import DataFrame
+
+from bamt.builders.builders_base import ParamDict
+from bamt.builders.hc_builder import HCStructureBuilder
+from bamt.log import logger_builder
+from bamt.utils.score_cache import ScoreCache
+
+if TYPE_CHECKING:
+    from bamt.networks.big_brave_bn import BigBraveBN
+
+
+def _learn_local(
+    data: DataFrame,
+    descriptor: Dict[str, Dict[str, str]],
+    scoring_function: Tuple[str, Callable],
+    has_logit: bool,
+    use_mixture: bool,
+    params: ParamDict,
+    score_cache: Optional[ScoreCache] = None,
+) -> Tuple[List[Tuple[str, str]], Dict]:
+    """
+    Structure of one cluster learned by HCStructureBuilder and scores of
+    score_cache (workers get empty caches, their scores are merged by parent).
+    """
+    builder = HCStructureBuilder(
+        data=data,
+        descriptor=descriptor,
+        scoring_function=scoring_function,
+        regressor=None,
+        has_logit=has_logit,
+        use_mixture=use_mixture,
+    )
+    builder.build(
+        data=data,
+        progress_bar=False,
+        classifier=None,
+        regressor=None,
+        params=params,
+        score_cache=score_cache,
+    )
+    scores = score_cache.scores if score_cache is not None else {}
+    return [tuple(edge) for edge in builder.skeleton["E"]], scores
+
+
+class PartitionStructureBuilder(HCStructureBuilder):
+    """
+    Divide-and-conquer structure learning for large networks.
+    Columns are clustered by Brave coefficients, structures of clusters are learned
+    independently (in parallel) and merged. Then one hill climbing pass over all
+    nodes keeps merged edges fixed and adds edges between clusters, choosing only
+    from pairs of columns with high Brave coefficients.
+    Clusters of the last build are kept in clusters attribute.
+    """
+
+    @staticmethod
+    def cluster(
+        n_columns: int,
+        pairs: List[Tuple[int, int]],
+        weights: np.ndarray,
+        max_cluster_size: int,
+    ) -> List[List[int]]:
+        """
+        Greedy agglomeration: pairs are joined from the strongest one while
+        clusters stay not bigger than max_cluster_size (Kruskal with size limit).
+        :param pairs: pairs of column indexes
+        :param weights: weights of pairs
+        :return: clusters of column indexes
+        """
+        parent = list(range(n_columns))
+        size = [1] * n_columns
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for k in np.argsort(-weights, kind="stable"):
+            a, b = find(pairs[k][0]), find(pairs[k][1])
+            if a != b and size[a] + size[b] <= max_cluster_size:
+                if size[a] < size[b]:
+                    a, b = b, a
+                parent[b] = a
+                size[a] += size[b]
+
+        clusters = {}
+        for i in range(n_columns):
+            clusters.setdefault(find(i), []).append(i)
+        return list(clusters.values())
+
+    def _local_params(self, params: ParamDict, columns: List[str]) -> ParamDict:
+        """
+        User's params restricted to columns of one cluster.
+        """
+        columns = set(columns)
+        local = {
+            "remove_init_edges": params.get("remove_init_edges", True),
+            "max_parents": params.get("max_parents"),
+        }
+        for name in ("init_edges", "white_list", "bl_add", "fixed_edges"):
+            if params.get(name) is not None:
+                local[name] = [
+                    (u, v) for u, v in params[name] if u in columns and v in columns
+                ]
+        if params.get("init_nodes"):
+            local["init_nodes"] = [v for v in params["init_nodes"] if v in columns]
+        if params.get("candidate_parents") is not None:
+            local["candidate_parents"] = dict(
+                [
+                    (v, [u for u in parents if u in columns])
+                    for v, parents in params["candidate_parents"].items()
+                    if v in columns
+                ]
+            )
+        return local
+
+    def build(
+        self,
+        data: DataFrame,
+        progress_bar: bool,
+        classifier: Optional[object],
+        regressor: Optional[object],
+        params: Optional[ParamDict] = None,
+        n_jobs: int = 1,
+        score_cache: Optional[ScoreCache] = None,
+        max_cluster_size: int = 50,
+        brave: Optional["BigBraveBN"] = None,
+        **kwargs,
+    ):
+        """
+        :param n_jobs: number of processes learning clusters, it is passed to
+        the final pass as well
+        :param score_cache: family scores shared between searches, scores of
+        clusters are keyed by data of clusters and merged into it after local
+        searches
+        :param max_cluster_size: maximal number of columns in cluster
+        :param brave: BigBraveBN defining Brave coefficients and threshold of
+        candidate edges, BigBraveBN() by default (approximate=True is suitable
+        for thousands of columns)
+        """
+        from bamt.networks.big_brave_bn import BigBraveBN
+
+        params = dict(params or {})
+        brave = brave or BigBraveBN()
+        columns = data.columns
+
+        brave_matrix = brave.get_brave_matrix(data).tocoo()
+        threshold = brave_matrix.data.max(initial=0) * brave.threshold
+        selected = brave_matrix.data > threshold
+        rows, cols = brave_matrix.row[selected], brave_matrix.col[selected]
+        clusters = self.cluster(
+            len(columns),
+            list(zip(rows, cols)),
+            brave_matrix.data[selected],
+            max_cluster_size,
+        )
+        self.clusters = [[columns[i] for i in cluster] for cluster in clusters]
+        logger_builder.info(
+            f"{len(clusters)} clusters, the biggest one has "
+            f"{max(len(c) for c in clusters)} columns."
+        )
+
+        # the biggest clusters are dispatched first
+        local = [
+            cluster
+            for cluster in sorted(self.clusters, key=len, reverse=True)
+            if len(cluster) > 1
+        ]
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_learn_local)(
+                data[cluster],
+                {
+                    "types": {c: self.descriptor["types"][c] for c in cluster},
+                    "signs": {
+                        c: self.descriptor["signs"][c]
+                        for c in cluster
+                        if c in self.descriptor["signs"]
+                    },
+                },
+                self.scoring_function,
+                self.has_logit,
+                self.use_mixture,
+                self._local_params(params, cluster),
+                ScoreCache() if score_cache is not None else None,
+            )
+            for cluster in local
+        )
+        local_edges = []
+        for edges, scores in results:
+            local_edges.extend(edges)
+            if score_cache is not None:
+                score_cache.scores.update(scores)
+
+        # boundary pass: edges between clusters among candidates of Brave
+        label = np.empty(len(columns), dtype=int)
+        for k, cluster in enumerate(clusters):
+            label[cluster] = k
+        boundary = [
+            (columns[i], columns[j])
+            for i, j in zip(rows, cols)
+            if label[i] != label[j]
+        ]
+        if params.get("white_list") is not None:
+            allowed = set(map(tuple, params["white_list"]))
+            boundary = [edge for edge in boundary if edge in allowed]
+
+        # merged structure of clusters is kept; init_edges inside clusters were
+        # used by local searches, the rest stay removable if remove_init_edges is True
+        fixed_edges = [tuple(edge) for edge in params.get("fixed_edges") or []]
+        params["fixed_edges"] = list(dict.fromkeys(local_edges + fixed_edges))
+        if params.get("init_edges"):
+            params["init_edges"] = [
+                (u, v)
+                for u, v in params["init_edges"]
+                if label[columns.get_loc(u)] != label[columns.get_loc(v)]
+            ]
+        params["white_list"] = boundary
+
+        super(PartitionStructureBuilder, self).build(
+            data=data,
+            progress_bar=progress_bar,
+            classifier=classifier,
+            regressor=regressor,
+            params=params,
+            n_jobs=n_jobs,
+            score_cache=score_cache,
+        )
@@ -0,0 +1 @@
+__all__ = ["factor", "variable_elimination", "junction_tree"]
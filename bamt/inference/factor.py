@@ -0,0 +1,117 @@
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+
+class Factor(object):
+    """
+    Discrete factor: a nonnegative table over variables.
+    values has one axis per variable, axis i indexes states of variables[i].
+    """
+
+    def __init__(self, variables: Sequence[str], values: np.ndarray):
+        """
+        :param variables: names of variables in order of axes
+        :param values: array with shape equal to cardinalities of variables
+        """
+        self.variables = tuple(variables)
+        self.values = np.asarray(values, dtype=float)
+        if self.values.ndim != len(self.variables):
+            raise ValueError(
+                f"Factor over {self.variables} got values with {self.values.ndim} axes."
+            )
+
+    def __repr__(self):
+        return f"Factor({', '.join(self.variables)})"
+
+    @property
+    def cardinality(self) -> Dict[str, int]:
+        return dict(zip(self.variables, self.values.shape))
+
+    def _expand(self, variables: Tuple[str, ...], shape: Dict[str, int]) -> np.ndarray:
+        """
+        View of values aligned to variables, axes of absent variables have length 1.
+        """
+        own = [v for v in variables if v in self.variables]
+        values = self.values.transpose([self.variables.index(v) for v in own])
+        return values.reshape([shape[v] if v in self.variables else 1 for v in variables])
+
+    def product(self, other: "Factor") -> "Factor":
+        variables = self.variables + tuple(
+            v for v in other.variables if v not in self.variables
+        )
+        shape = {**other.cardinality, **self.cardinality}
+        values = self._expand(variables, shape) * other._expand(variables, shape)
+        return Factor(variables, values)
+
+    def marginalize(self, variables: Sequence[str]) -> "Factor":
+        """
+        Sum variables out.
+        """
+        axes = tuple(self.variables.index(v) for v in variables)
+        rest = [v for v in self.variables if v not in variables]
+        return Factor(rest, self.values.sum(axis=axes))
+
+    def maximize(self, variables: Sequence[str]) -> "Factor":
+        """
+        Max variables out.
+        """
+        axes = tuple(self.variables.index(v) for v in variables)
+        rest = [v for v in self.variables if v not in variables]
+        return Factor(rest, self.values.max(axis=axes))
+
+    def reduce(self, evidence: Dict[str, int]) -> "Factor":
+        """
+        Fix variables to observed states (state codes) and drop their axes.
+        """
+        index = tuple(
+            evidence[v] if v in evidence else slice(None) for v in self.variables
+        )
+        rest = [v for v in self.variables if v not in evidence]
+        return Factor(rest, self.values[index])
+
+    def normalize(self) -> "Factor":
+        total = self.values.sum()
+        if total > 0:
+            return Factor(self.variables, self.values / total)
+        return Factor(self.variables, self.values)
+
+
+def factor_product(factors: Sequence[Factor]) -> Factor:
+    result = Factor((), np.array(1.0))
+    for factor in factors:
+        result = result.product(factor)
+    return result
+
+
+def cpt_factor(node, node_info: Dict, states: Dict[str, Sequence[str]]) -> Factor:
+    """
+    Factor P(node | parents) built from fitted cprob of discrete node.
+    Axes are parents (disc_parents + cont_parents order) followed by node itself.
+    Parent combinations absent in cprob get default (uniform) distribution.
+    :param node: DiscreteNode
+    :param node_info: node's distribution
+    :param states: states of every variable
+    """
+    parents = node.disc_parents + node.cont_parents
+    compiled = node.compiled_cprob(node_info)
+    n_vals = len(node_info["vals"])
+    if not parents:
+        return Factor([node.name], compiled.table[0])
+
+    table, known = compiled.dense()
+    table = table.reshape(compiled.shape + (n_vals,))
+    known = known.reshape(compiled.shape)
+    index = [
+        categories.get_indexer(states[parent])
+        for parent, categories in zip(parents, compiled.parents_categories)
+    ]
+    grid = np.ix_(*[np.maximum(i, 0) for i in index])
+    values = table[grid]
+    observed = known[grid]
+    for axis, i in enumerate(index):
+        shape = [1] * len(index)
+        shape[axis] = -1
+        observed = observed & (i >= 0).reshape(shape)
+    values[~observed] = compiled.default if compiled.default is not None else 1 / n_vals
+    return Factor(parents + [node.name], values)
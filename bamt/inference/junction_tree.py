@@ -0,0 +1,187 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .factor import Factor, factor_product
+from .variable_elimination import VariableElimination, elimination_order
+
+
+class JunctionTree(VariableElimination):
+    """
+    Exact inference in discrete Bayesian network on a junction tree.
+    The tree and initial clique potentials are compiled once; calibrations
+    (beliefs of cliques after sum-product message passing) are cached per evidence set.
+    """
+
+    def __init__(
+        self,
+        factors: Dict[str, Factor],
+        states: Dict[str, List[str]],
+        max_cached: int = 32,
+    ):
+        """
+        :param factors: CPT factor of every variable, variable itself is the last axis
+        :param states: states of every variable
+        :param max_cached: number of calibrations to keep
+        """
+        super(JunctionTree, self).__init__(factors, states)
+        self.max_cached = max_cached
+        self._calibrations = OrderedDict()
+        self.cliques = self._triangulate()
+        self.neighbours = self._spanning_tree()
+        self.potentials = self._assign_factors()
+
+    def _triangulate(self) -> List[tuple]:
+        """
+        Cliques of moral graph triangulated by elimination order.
+        """
+        factors = list(self.factors.values())
+        neighbours = {v: set() for v in self.factors}
+        for factor in factors:
+            for v in factor.variables:
+                neighbours[v].update(u for u in factor.variables if u != v)
+
+        cliques = []
+        for v in elimination_order(factors, list(self.factors)):
+            clique = {v} | neighbours[v]
+            for a in neighbours[v]:
+                neighbours[a].discard(v)
+                neighbours[a].update(neighbours[v] - {a})
+            del neighbours[v]
+            if not any(clique <= other for other in cliques):
+                cliques = [other for other in cliques if not other <= clique]
+                cliques.append(clique)
+
+        variables = list(self.factors)
+        return [tuple(v for v in variables if v in clique) for clique in cliques]
+
+    def _spanning_tree(self) -> List[List[int]]:
+        """
+        Maximum spanning tree on separator sizes (Prim), components are joined
+        by empty separators.
+        """
+        n = len(self.cliques)
+        sets = [set(clique) for clique in self.cliques]
+        neighbours = [[] for _ in range(n)]
+        in_tree = np.zeros(n, dtype=bool)
+        in_tree[0] = True
+        weight = np.array([len(sets[0] & s) for s in sets])
+        source = np.zeros(n, dtype=int)
+        for _ in range(n - 1):
+            j = int(np.argmax(np.where(in_tree, -1, weight)))
+            neighbours[source[j]].append(j)
+            neighbours[j].append(source[j])
+            in_tree[j] = True
+            for k in np.flatnonzero(~in_tree):
+                w = len(sets[j] & sets[k])
+                if w > weight[k]:
+                    weight[k] = w
+                    source[k] = j
+        return neighbours
+
+    def _assign_factors(self) -> List[Factor]:
+        """
+        Multiply every CPT into the first clique which contains its family.
+        """
+        cardinality = {v: len(states) for v, states in self.states.items()}
+        potentials = [
+            Factor(clique, np.ones([cardinality[v] for v in clique]))
+            for clique in self.cliques
+        ]
+        for factor in self.factors.values():
+            family = set(factor.variables)
+            i = next(i for i, clique in enumerate(self.cliques) if family <= set(clique))
+            potentials[i] = self._align(potentials[i].product(factor), self.cliques[i])
+        return potentials
+
+    @staticmethod
+    def _align(factor: Factor, variables: Sequence[str]) -> Factor:
+        order = [factor.variables.index(v) for v in variables]
+        return Factor(variables, factor.values.transpose(order))
+
+    def _separator(self, i: int, j: int) -> List[str]:
+        return [v for v in self.cliques[i] if v in self.cliques[j]]
+
+    def _message(self, i: int, j: int, potentials, messages) -> Factor:
+        """
+        Message from clique i to clique j, normalized against underflow.
+        """
+        incoming = [messages[(k, i)] for k in self.neighbours[i] if k != j]
+        phi = factor_product([potentials[i]] + incoming)
+        separator = self._separator(i, j)
+        message = phi.marginalize([v for v in phi.variables if v not in separator])
+        return message.normalize()
+
+    def calibrate(self, evidence: Optional[Dict[str, str]] = None) -> List[Factor]:
+        """
+        Beliefs of cliques given evidence (two-pass sum-product message passing).
+        :param evidence: observed states, {variable: state}
+        """
+        codes = self.encode(evidence)
+        key = tuple(sorted(codes.items()))
+        if key in self._calibrations:
+            self._calibrations.move_to_end(key)
+            return self._calibrations[key]
+
+        # evidence zeroes inconsistent entries, so shapes of potentials stay the same
+        potentials = []
+        for potential in self.potentials:
+            values = potential.values.copy()
+            for axis, v in enumerate(potential.variables):
+                if v in codes:
+                    mask = np.zeros(values.shape[axis], dtype=bool)
+                    mask[codes[v]] = True
+                    shape = [1] * values.ndim
+                    shape[axis] = -1
+                    values = values * mask.reshape(shape)
+            potentials.append(Factor(potential.variables, values))
+
+        # order of cliques from root, parents precede children
+        order, parent = [0], {0: None}
+        for i in order:
+            for j in self.neighbours[i]:
+                if j not in parent:
+                    parent[j] = i
+                    order.append(j)
+
+        messages = {}
+        for i in reversed(order[1:]):
+            messages[(i, parent[i])] = self._message(i, parent[i], potentials, messages)
+        for i in order:
+            for j in self.neighbours[i]:
+                if j != parent[i]:
+                    messages[(i, j)] = self._message(i, j, potentials, messages)
+
+        beliefs = []
+        for i, potential in enumerate(potentials):
+            incoming = [messages[(k, i)] for k in self.neighbours[i]]
+            belief = self._align(factor_product([potential] + incoming), self.cliques[i])
+            beliefs.append(belief)
+        if beliefs[0].values.sum() == 0:
+            raise ValueError("Evidence has zero probability.")
+
+        self._calibrations[key] = beliefs
+        if len(self._calibrations) > self.max_cached:
+            self._calibrations.popitem(last=False)
+        return beliefs
+
+    def query(
+        self, variables: Sequence[str], evidence: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Factor]:
+        """
+        Posterior marginal of every variable given evidence.
+        :param variables: query variables
+        :param evidence: observed states, {variable: state}
+        """
+        beliefs = self.calibrate(evidence)
+        marginals = {}
+        for variable in variables:
+            i = min(
+                (i for i, clique in enumerate(self.cliques) if variable in clique),
+                key=lambda i: beliefs[i].values.size,
+            )
+            belief = beliefs[i]
+            marginal = belief.marginalize([v for v in belief.variables if v != variable])
+            marginals[variable] = marginal.normalize()
+        return marginals
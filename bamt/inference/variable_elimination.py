@@ -0,0 +1,155 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .factor import Factor, factor_product
+
+
+def elimination_order(factors: Sequence[Factor], variables: Sequence[str]) -> List[str]:
+    """
+    Greedy min-fill order (ties broken by min-weight) on interaction graph of factors.
+    :param factors: factors which define interaction graph
+    :param variables: variables to eliminate
+    """
+    neighbours = {}
+    cardinality = {}
+    for factor in factors:
+        cardinality.update(factor.cardinality)
+        for v in factor.variables:
+            neighbours.setdefault(v, set()).update(
+                u for u in factor.variables if u != v
+            )
+
+    order = []
+    remaining = set(variables)
+    while remaining:
+
+        def cost(v):
+            nbrs = list(neighbours.get(v, ()))
+            fill = sum(
+                1
+                for i, a in enumerate(nbrs)
+                for b in nbrs[i + 1 :]
+                if b not in neighbours[a]
+            )
+            weight = np.prod([cardinality[u] for u in nbrs]) if nbrs else 1
+            return fill, weight, v
+
+        v = min(remaining, key=cost)
+        nbrs = neighbours.pop(v, set())
+        for a in nbrs:
+            neighbours[a].discard(v)
+            neighbours[a].update(nbrs - {a})
+        remaining.remove(v)
+        order.append(v)
+    return order
+
+
+class VariableElimination(object):
+    """
+    Exact inference in discrete Bayesian network by variable elimination.
+    """
+
+    def __init__(self, factors: Dict[str, Factor], states: Dict[str, List[str]]):
+        """
+        :param factors: CPT factor of every variable, variable itself is the last axis
+        :param states: states of every variable
+        """
+        self.factors = factors
+        self.states = states
+        self.parents = {v: factor.variables[:-1] for v, factor in factors.items()}
+
+    def encode(self, evidence: Optional[Dict[str, str]]) -> Dict[str, int]:
+        """
+        Turn observed states into state codes.
+        """
+        codes = {}
+        for variable, value in (evidence or {}).items():
+            if value not in self.states[variable]:
+                raise ValueError(f"Unknown state {value} of {variable}.")
+            codes[variable] = self.states[variable].index(value)
+        return codes
+
+    def _relevant_factors(self, variables, evidence: Dict[str, int]) -> List[Factor]:
+        """
+        CPTs of ancestors of query and evidence, reduced by evidence.
+        CPTs of other (barren) variables sum to one and do not change the answer.
+        """
+        relevant = set()
+        stack = list(variables) + list(evidence)
+        while stack:
+            v = stack.pop()
+            if v not in relevant:
+                relevant.add(v)
+                stack.extend(self.parents[v])
+        return [self.factors[v].reduce(evidence) for v in self.factors if v in relevant]
+
+    @staticmethod
+    def _eliminate(factors: List[Factor], variables, maximize: bool = False):
+        """
+        Eliminate variables one by one.
+        Returns remaining factors and list of (variable, factor before elimination).
+        """
+        eliminated = []
+        for v in elimination_order(factors, variables):
+            involved = [f for f in factors if v in f.variables]
+            factors = [f for f in factors if v not in f.variables]
+            phi = factor_product(involved)
+            eliminated.append((v, phi))
+            factors.append(phi.maximize([v]) if maximize else phi.marginalize([v]))
+        return factors, eliminated
+
+    def query(
+        self, variables: Sequence[str], evidence: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Factor]:
+        """
+        Posterior marginal of every variable given evidence.
+        :param variables: query variables
+        :param evidence: observed states, {variable: state}
+        """
+        codes = self.encode(evidence)
+        marginals = {}
+        for variable in variables:
+            if variable in codes:
+                values = np.zeros(len(self.states[variable]))
+                values[codes[variable]] = 1
+                marginals[variable] = Factor([variable], values)
+                continue
+            factors = self._relevant_factors([variable], codes)
+            hidden = {v for f in factors for v in f.variables} - {variable}
+            factors, _ = self._eliminate(factors, hidden)
+            posterior = factor_product(factors)
+            if posterior.values.sum() == 0:
+                raise ValueError("Evidence has zero probability.")
+            marginals[variable] = posterior.normalize()
+        return marginals
+
+    def map_query(
+        self,
+        variables: Optional[Sequence[str]] = None,
+        evidence: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, str]:
+        """
+        Most probable joint assignment of variables given evidence
+        (other variables are summed out).
+        :param variables: query variables, all unobserved variables by default
+        :param evidence: observed states, {variable: state}
+        """
+        codes = self.encode(evidence)
+        if variables is None:
+            variables = [v for v in self.factors if v not in codes]
+        variables = [v for v in variables if v not in codes]
+
+        factors = self._relevant_factors(variables, codes)
+        hidden = {v for f in factors for v in f.variables} - set(variables)
+        factors, _ = self._eliminate(factors, hidden)
+        factors, eliminated = self._eliminate(factors, variables, maximize=True)
+        if factor_product(factors).values.sum() == 0:
+            raise ValueError("Evidence has zero probability.")
+
+        # traceback: variables eliminated later are already assigned
+        assignment = {}
+        for v, phi in reversed(eliminated):
+            phi = phi.reduce({u: assignment[u] for u in phi.variables if u != v})
+            assignment[v] = int(np.argmax(phi.values))
+        return {v: self.states[v][assignment[v]] for v in variables}
@@ -90,6 +90,66 @@ def entropy_gauss(pd_data):
             return sys.float_info.min
 
 
+def entropy_groups(data_disc: pd.DataFrame, data_cont: pd.DataFrame):
+    """
+    Splits continuous data by combinations of discrete values in one pass.
+    Group means and scatter matrices are summed over rows sorted by group
+    (np.add.reduceat), so covariances and determinants of all groups are
+    computed at once, values are the same as entropy_gauss of every group.
+            Arguments
+    ----------
+    *data_disc* : pd.DataFrame
+    *data_cont* : pd.DataFrame
+    Returns
+    -------
+    *groups* : list of (count, entropy) for every combination in order of appearance,
+        entropy_gauss of the group's continuous data; None for combinations met once
+    Effects
+    -------
+    None
+    """
+    codes = np.column_stack([pd.factorize(data_disc[col])[0] for col in data_disc])
+    _, first, inverse, counts = np.unique(
+        codes, axis=0, return_index=True, return_inverse=True, return_counts=True
+    )
+    inverse = inverse.reshape(-1)
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    x = data_cont.to_numpy(dtype=float)
+    means = np.add.reduceat(x[order], starts, axis=0) / counts[:, None]
+    centered = x[order] - means[inverse[order]]
+    scatter = np.add.reduceat(
+        centered[:, :, None] * centered[:, None, :], starts, axis=0
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if x.shape[1] == 1:
+            # entropy_gauss of one column: np.var
+            dispersion = scatter[:, 0, 0] / counts
+            entropies = 0.5 * (1 + np.log(dispersion * 2 * math.pi))
+        else:
+            # entropy_gauss of several columns: determinant of np.cov,
+            # N of entropy_gauss is ndim of the determinant, i.e. 0
+            dispersion = np.linalg.det(
+                scatter / np.maximum(counts - 1, 1)[:, None, None]
+            )
+            entropies = 0.5 * np.log(dispersion)
+    # nan dispersion (nan in continuous data) fails the check as in entropy_gauss
+    entropies = np.where(dispersion > 1e-16, entropies, sys.float_info.min)
+
+    groups = []
+    for comb in np.argsort(first):
+        count = int(counts[comb])
+        if count == 1:
+            groups.append((count, None))
+        elif (codes[first[comb]] < 0).any():
+            # nan never matches value filter, so the group has no data
+            groups.append((count, 0.0))
+        else:
+            groups.append((count, float(entropies[comb])))
+    return groups
+
+
 def entropy_all(data, method="MI"):
     """
         For one varibale, H(X) is equal to the following:
@@ -128,39 +188,20 @@ def entropy_all(data, method="MI"):
             return entropy_gauss(data_cont)
         else:
             H_disc = entropy(data_disc.values)
-            dict_comb = {}
-            comb_prob = {}
-            for i in range(len(data_disc)):
-                row = data_disc.iloc[i]
-                comb = ""
-                for _, val in row.items():
-                    comb = comb + str(val) + ", "
-                if comb not in dict_comb:
-                    dict_comb[comb] = row
-                    comb_prob[comb] = 1
-                else:
-                    comb_prob[comb] += 1
+            H_gauss = entropy_gauss(data[column_cont])
 
             H_cond = 0.0
-            for key in list(dict_comb.keys()):
-                filtered_data = query_filter(data, column_disc, list(dict_comb[key]))
-                filtered_data = filtered_data[column_cont]
-                if comb_prob[key] == 1:
+            for count, H in entropy_groups(data_disc, data_cont):
+                if count == 1:
                     if (method == "BIC") | (method == "AIC"):
-                        H_cond += (
-                            comb_prob[key]
-                            / len(data_disc)
-                            * entropy_gauss(data[column_cont])
-                        )
+                        H_cond += count / len(data_disc) * H_gauss
                     else:
-                        H_cond += comb_prob[key] / len(data_disc) * sys.float_info.max
+                        H_cond += count / len(data_disc) * sys.float_info.max
                 else:
-                    H_cond += (
-                        comb_prob[key] / len(data_disc) * entropy_gauss(filtered_data)
-                    )
+                    H_cond += count / len(data_disc) * H
                 if (method == "BIC") | (method == "AIC"):
-                    if H_cond > entropy_gauss(data[column_cont]):
-                        H_cond = entropy_gauss(data[column_cont])
+                    if H_cond > H_gauss:
+                        H_cond = H_gauss
 
             return H_disc + H_cond
 
@@ -171,29 +212,14 @@ def entropy_cond(data, column_cont, column_disc, method):
     H_gauss = entropy_gauss(data_cont)
     H_cond = 0.0
 
-    dict_comb = {}
-    comb_prob = {}
-    for i in range(len(data_disc)):
-        row = data_disc.iloc[i]
-        comb = ""
-        for _, val in row.items():
-            comb = comb + str(val) + ", "
-        if comb not in dict_comb:
-            dict_comb[comb] = row
-            comb_prob[comb] = 1
-        else:
-            comb_prob[comb] += 1
-
-    for key in list(dict_comb.keys()):
-        filtered_data = query_filter(data, column_disc, list(dict_comb[key]))
-        filtered_data = filtered_data[column_cont]
-        if comb_prob[key] == 1:
+    for count, H in entropy_groups(data_disc, data_cont):
+        if count == 1:
             if (method == "BIC") | (method == "AIC"):
-                H_cond += comb_prob[key] / len(data_disc) * H_gauss
+                H_cond += count / len(data_disc) * H_gauss
             else:
-                H_cond += comb_prob[key] / len(data_disc) * sys.float_info.max
+                H_cond += count / len(data_disc) * sys.float_info.max
         else:
-            H_cond += comb_prob[key] / len(data_disc) * entropy_gauss(filtered_data)
+            H_cond += count / len(data_disc) * H
     if (method == "BIC") | (method == "AIC"):
         if H_cond > H_gauss:
             return H_gauss
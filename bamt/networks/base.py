@@ -1,9 +1,22 @@
+import heapq
 import json
 import os.path as path
 import random
 import re
 from copy import deepcopy
-from typing import Dict, Tuple, List, Callable, Optional, Type, Union, Any, Sequence
+from typing import (
+    Dict,
+    Tuple,
+    List,
+    Callable,
+    Optional,
+    Type,
+    Union,
+    Any,
+    Sequence,
+    Iterable,
+    Iterator,
+)
 
 import numpy as np
 import pandas as pd
@@ -16,6 +29,7 @@ import bamt.builders as builders
 from bamt.builders.builders_base import ParamDict
 from bamt.builders.evo_builder import EvoStructureBuilder
 from bamt.builders.hc_builder import HCStructureBuilder
+from bamt.builders.partition_builder import PartitionStructureBuilder
 from bamt.display import plot_, get_info_
 from bamt.external.pyitlib.DiscreteRandomVariableUtils import (
     entropy,
@@ -24,7 +38,12 @@ from bamt.external.pyitlib.DiscreteRandomVariableUtils import (
     entropy_conditional,
 )
 from bamt.log import logger_network
-from bamt.nodes.base import BaseNode
+from bamt.nodes.base import BaseNode, LazyCombinations
+from bamt.nodes.conditional_mixture_gaussian_node import (
+    ConditionalMixtureGaussianNode,
+)
+from bamt.nodes.discrete_node import DiscreteNode
+from bamt.nodes.mixture_gaussian_node import MixtureGaussianNode
 from bamt.utils import GraphUtils, serialization_utils, check_utils
 
 
@@ -50,15 +69,90 @@ class BaseNetwork(object):
         self.has_logit = False
         self.use_mixture = False
         self.encoders = {}
+        self._statistics = {}
+        # type and parents of nodes at the moment of their fitting
+        self._fitted_families = {}
+
+    @property
+    def nodes(self) -> List[Type[BaseNode]]:
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes: List[Type[BaseNode]]):
+        self._nodes = nodes
+        self._topology = None
+
+    @property
+    def edges(self) -> List[Sequence[str]]:
+        return self._edges
+
+    @edges.setter
+    def edges(self, edges: List[Sequence[str]]):
+        self._edges = edges
+        self._topology = None
+
+    def _graph(self) -> Dict[str, Any]:
+        """
+        Name index, parents, children and topological order of nodes.
+        Cache is dropped when nodes or edges are replaced (set_nodes, set_edges,
+        add_edges) and rebuilt on demand.
+        """
+        if self._topology is None or self._topology["size"] != len(self._nodes):
+            index = {node.name: node for node in self._nodes}
+            parents = {
+                name: [p for p in node.parents if p in index]
+                for name, node in index.items()
+            }
+            children = {name: [] for name in index}
+            for name, node_parents in parents.items():
+                for parent in node_parents:
+                    children[parent].append(name)
+
+            # Kahn's algorithm, ties are resolved by position in nodes list
+            position = {name: i for i, name in enumerate(index)}
+            in_degree = {name: len(parents[name]) for name in index}
+            heap = [position[name] for name, d in in_degree.items() if d == 0]
+            heapq.heapify(heap)
+            names = list(index)
+            order = []
+            while heap:
+                name = names[heapq.heappop(heap)]
+                order.append(name)
+                for child in children[name]:
+                    in_degree[child] -= 1
+                    if not in_degree[child]:
+                        heapq.heappush(heap, position[child])
+            if len(order) != len(names):
+                logger_network.warning("Graph contains a cycle, nodes order is kept.")
+                order = names
+
+            self._topology = {
+                "size": len(self._nodes),
+                "index": index,
+                "parents": parents,
+                "children": children,
+                "order": order,
+            }
+        return self._topology
 
     @property
     def nodes_names(self) -> List[str]:
-        return [node.name for node in self.nodes]
+        return list(self._graph()["index"])
 
     def __getitem__(self, node_name: str) -> Type[BaseNode]:
-        if node_name in self.nodes_names:
-            index = self.nodes_names.index(node_name)
-            return self.nodes[index]
+        return self._graph()["index"].get(node_name)
+
+    def parents(self, node_name: str) -> List[str]:
+        """Names of node's parents (continuous first)"""
+        return list(self._graph()["parents"][node_name])
+
+    def children(self, node_name: str) -> List[str]:
+        return list(self._graph()["children"][node_name])
+
+    def topological_order(self) -> List[Type[BaseNode]]:
+        """Nodes ordered so that parents precede their children"""
+        graph = self._graph()
+        return [graph["index"][name] for name in graph["order"]]
 
     def validate(self, descriptor: Dict[str, Dict[str, str]]) -> bool:
         types = descriptor["types"]
@@ -130,6 +224,20 @@ class BaseNetwork(object):
         init_edges: list of tuples, a graph to start learning with
         remove_init_edges: allows changes in a model defined by user
         white_list: list of allowed edges
+        fixed_edges: list of edges which are always kept, whatever remove_init_edges
+        is (HC)
+        max_parents: maximal number of parents of node (HC). None keeps the default
+        of the scoring function: 3 for MI, LL, BIC and AIC (as before the param was
+        added), unlimited for K2 and other pgmpy scores
+        candidate_parents: dict {node: allowed parents} (HC), e.g. from
+        bamt.utils.MathUtils.mmpc_candidates or BigBraveBN.get_candidate_parents
+        Kwargs:
+        n_jobs: number of processes to score candidate families in HC (MI, LL, BIC, AIC)
+        or to run evolutionary search
+        score_cache: bamt.utils.score_cache.ScoreCache with family scores to reuse
+        across searches on the same data (HC and Evo with default K2 metric)
+        max_cluster_size, brave: clustering of columns for optimizer="Partition"
+        (divide-and-conquer HC for large networks), see PartitionStructureBuilder
         """
         if not self.has_logit and check_utils.is_model(classifier):
             logger_network.error("Classifiers dict with use_logit=False is forbidden.")
@@ -176,6 +284,15 @@ class BaseNetwork(object):
                 use_mixture=self.use_mixture,
                 regressor=regressor,
             )
+        elif optimizer == "Partition":
+            worker = PartitionStructureBuilder(
+                data=data,
+                descriptor=self.descriptor,
+                scoring_function=scoring_function,
+                has_logit=self.has_logit,
+                use_mixture=self.use_mixture,
+                regressor=regressor,
+            )
         elif optimizer == "Evo":
             worker = EvoStructureBuilder(
                 data=data,
@@ -271,12 +388,13 @@ class BaseNetwork(object):
                 "In case of manual setting nodes user should set map for them as well."
             )
             return
-        self.nodes = []
+        checked = []
         for node in nodes:
             if issubclass(type(node), BaseNode):
-                self.nodes.append(node)
+                checked.append(node)
             else:
                 logger_network.error(f"{node} is not an instance of {BaseNode}")
+        self.nodes = checked
 
         if info:
             self.descriptor = info
@@ -385,6 +503,10 @@ class BaseNetwork(object):
 
         for node, data in self.distributions.items():
             if "hybcprob" in data.keys():
+                if not isinstance(data["hybcprob"], LazyCombinations):
+                    data["hybcprob"] = LazyCombinations(
+                        data["hybcprob"], self[node].empty_params()
+                    )
                 if "mixture" in self[node].type.lower():
                     continue
                 else:
@@ -419,6 +541,7 @@ class BaseNetwork(object):
                     self[node].type = re.sub(
                         r"\([\s\S]*\)", f"({None})", self[node].type
                     )
+        self._mark_fitted([self[node] for node in self.distributions if self[node]])
 
     @staticmethod
     def _save_to_file(outdir: str, data: Union[dict, list]):
@@ -593,36 +716,299 @@ class BaseNetwork(object):
             self.weights = weights
         return True
 
-    def fit_parameters(self, data: pd.DataFrame, n_jobs: int = 1):
+    def _fit_data(self, data: pd.DataFrame, inplace: bool = True) -> pd.DataFrame:
+        """
+        Prepare data for parameter learning.
+        inplace: cast columns of input data itself, otherwise columns are replaced in
+        a shallow copy and input is not mutated
+        """
+        if not inplace:
+            data = data.copy(deep=False)
+        if type(self).__name__ == "CompositeBN":
+            data = self._encode_categorical_data(data)
+
+        # Turn all discrete values to str for learning algorithm
+        for name, t in self.descriptor["types"].items():
+            if t == "disc_num" and name in data.columns:
+                data[name] = data[name].astype("str")
+        return data
+
+    @staticmethod
+    def _read_chunks(
+        source: Union[str, Iterable[pd.DataFrame]], chunksize: int
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterate over chunks of data from iterable of DataFrames or csv/parquet file.
+        """
+        if not isinstance(source, str):
+            yield from source
+        elif source.endswith(".parquet"):
+            try:
+                import pyarrow.parquet as pq
+            except ModuleNotFoundError:
+                raise ModuleNotFoundError(
+                    "pyarrow is required to read parquet files in chunks."
+                )
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(source, chunksize=chunksize)
+
+    @staticmethod
+    def _fit_cost(node: Type[BaseNode], data: pd.DataFrame) -> float:
+        """
+        Rough relative cost of fitting node's params.
+        """
+        cost = len(data) * (1 + len(node.cont_parents))
+        if "Mixture" in node.type:
+            # EM with selection of number of components
+            cost *= 100
+        elif node.type != "Discrete":
+            cost *= 10
+        if "Conditional" in node.type and node.disc_parents:
+            # one model per combination of discrete parents
+            combinations = np.prod([data[p].nunique() for p in node.disc_parents])
+            cost *= min(combinations, len(data))
+        return cost
+
+    def _fit_nodes(
+        self, nodes: List[Type[BaseNode]], data: pd.DataFrame, n_jobs: int = 1
+    ) -> Dict[str, Dict]:
+        """
+        Fit params of nodes in parallel.
+        Every task gets only columns of its node and node's parents instead of
+        the whole data. The most expensive nodes (mixtures, conditional models)
+        are dispatched first, so a slow node doesn't hold up the pool at the end.
+        """
+        if n_jobs == 1:
+            return {node.name: node.fit_parameters(data) for node in nodes}
+
+        scheduled = sorted(nodes, key=lambda node: -self._fit_cost(node, data))
+
+        def worker(node, columns):
+            return node.fit_parameters(columns)
+
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(worker)(
+                node, data[[node.name] + node.disc_parents + node.cont_parents]
+            )
+            for node in scheduled
+        )
+
+        # code for debugging, do not remove
+        # results = [worker(node, data) for node in scheduled]
+
+        fitted = {node.name: result for node, result in zip(scheduled, results)}
+        return {node.name: fitted[node.name] for node in nodes}
+
+    def fit_parameters(
+        self,
+        data: pd.DataFrame,
+        n_jobs: int = 1,
+        sparse_cpt: bool = False,
+        keep_statistics: bool = False,
+        mixture_n_jobs: Optional[int] = None,
+        mixture_patience: Optional[int] = None,
+    ):
         """
         Base function for parameter learning
+        sparse_cpt: discrete nodes store only observed combinations of parents
+        and one default distribution for the others
+        keep_statistics: keep sufficient statistics of nodes for partial_fit (one
+        more pass over data). Without them the first partial_fit refits nodes on
+        its full_data and keeps statistics from then on.
+        mixture_n_jobs: number of threads fitting candidate numbers of components
+        of mixture nodes
+        mixture_patience: mixture nodes stop the search of number of components
+        after this many candidates without improvement of AIC and BIC
+        (None - all candidates are fitted)
+        Mixture options are kept by nodes and used by later refits as well.
         """
         if data.isnull().values.any():
             logger_network.error("Dataframe contains NaNs.")
             return
 
-        if type(self).__name__ == "CompositeBN":
-            data = self._encode_categorical_data(data)
+        data = self._fit_data(data)
 
-        # Turn all discrete values to str for learning algorithm
-        if "disc_num" in self.descriptor["types"].values():
-            columns_names = [
-                name
-                for name, t in self.descriptor["types"].items()
-                if t in ["disc_num"]
-            ]
-            data[columns_names] = data.loc[:, columns_names].astype("str")
+        for node in self.nodes:
+            if isinstance(node, DiscreteNode):
+                node.sparse = sparse_cpt
+            elif isinstance(
+                node, (MixtureGaussianNode, ConditionalMixtureGaussianNode)
+            ):
+                node.n_jobs = mixture_n_jobs
+                node.patience = mixture_patience
+
+        self.distributions.update(self._fit_nodes(self.nodes, data, n_jobs))
+        self._statistics = {}
+        if keep_statistics:
+            self._statistics = {
+                node.name: node.statistics(data) for node in self.nodes
+            }
+        self._mark_fitted(self.nodes)
 
-        def worker(node):
-            return node.fit_parameters(data)
+    def fit_parameters_chunked(
+        self,
+        chunks: Union[str, Iterable[pd.DataFrame]],
+        chunksize: int = 100000,
+        sparse_cpt: bool = False,
+    ):
+        """
+        Parameter learning on data which doesn't fit in memory.
+        Sufficient statistics of nodes (contingency counts, moment matrices) are
+        accumulated chunk by chunk, chunks are never concatenated.
+        Only nodes supporting statistics (discrete nodes, gaussian nodes with
+        linear regression) can be fitted this way.
+
+        chunks: iterable of DataFrames or path to csv/parquet file
+        chunksize: number of rows in chunk read from file
+        sparse_cpt: discrete nodes store only observed combinations of parents
+        """
+        for node in self.nodes:
+            if isinstance(node, DiscreteNode):
+                node.sparse = sparse_cpt
 
-        results = Parallel(n_jobs=n_jobs)(delayed(worker)(node) for node in self.nodes)
+        statistics = {}
+        for chunk in self._read_chunks(chunks, chunksize):
+            if chunk.empty:
+                continue
+            if chunk.isnull().values.any():
+                logger_network.error("Dataframe contains NaNs.")
+                return
+            chunk = self._fit_data(chunk, inplace=False)
+            for node in self.nodes:
+                other = node.statistics(chunk)
+                if other is None:
+                    logger_network.error(
+                        f"Node {node.name} ({node.type}) can't be fitted by chunks."
+                    )
+                    return
+                if node.name in statistics:
+                    other = node.merge_statistics(statistics[node.name], other)
+                statistics[node.name] = other
 
-        # code for debugging, do not remove
-        # results = [worker(node) for node in self.nodes]
+        if not statistics:
+            logger_network.error("No data to fit parameters.")
+            return
+
+        for node in self.nodes:
+            self.distributions[node.name] = node.from_statistics(statistics[node.name])
+        self._statistics = statistics
+        self._mark_fitted(self.nodes)
+
+    def partial_fit(
+        self,
+        data: pd.DataFrame,
+        n_jobs: int = 1,
+        full_data: Optional[pd.DataFrame] = None,
+    ):
+        """
+        Update parameters with new data for fixed structure.
+        Sufficient statistics are updated in place: counts for discrete nodes,
+        running mean/variance for root gaussian nodes and normal equations for
+        gaussian nodes with linear regression. Other nodes are refitted, as well
+        as all nodes on the first call after fit_parameters without
+        keep_statistics.
+
+        data: new observations
+        n_jobs: number of workers to refit nodes
+        full_data: all observations including new ones, used to refit nodes which
+        can't be updated (only new data is used if it is not passed)
+        """
+        if not self.distributions:
+            logger_network.error(
+                "Parameter learning wasn't done. Call fit_parameters method"
+            )
+            return
+        if data.isnull().values.any():
+            logger_network.error("Dataframe contains NaNs.")
+            return
+
+        data = self._fit_data(data, inplace=False)
+
+        # statistics of nodes with new parents don't match their families
+        refit = self.changed_nodes()
+        for node in self.nodes:
+            if node in refit:
+                continue
+            statistics = self._statistics.get(node.name)
+            other = node.statistics(data) if statistics is not None else None
+            if other is None:
+                refit.append(node)
+                continue
+            statistics = node.merge_statistics(statistics, other)
+            self.distributions[node.name] = node.from_statistics(statistics)
+            self._statistics[node.name] = statistics
+
+        if not refit:
+            return
+        if full_data is None:
+            logger_network.warning(
+                f"Nodes {[node.name for node in refit]} can't be updated "
+                f"incrementally and are refitted on new data only."
+            )
+            full_data = data
+        else:
+            full_data = self._fit_data(full_data, inplace=False)
+
+        self.distributions.update(self._fit_nodes(refit, full_data, n_jobs))
+        for node in refit:
+            self._statistics[node.name] = node.statistics(full_data)
+        self._mark_fitted(refit)
+
+    @staticmethod
+    def _family(node: Type[BaseNode]) -> Tuple:
+        return node.type, tuple(node.disc_parents), tuple(node.cont_parents)
+
+    def _mark_fitted(self, nodes: List[Type[BaseNode]]):
+        for node in nodes:
+            self._fitted_families[node.name] = self._family(node)
+
+    def changed_nodes(self) -> List[Type[BaseNode]]:
+        """
+        Nodes whose type or parents changed since their params were fitted
+        (after set_edges/set_structure/add_edges), and nodes never fitted.
+        """
+        return [
+            node
+            for node in self.nodes
+            if node.name not in self.distributions
+            or self._fitted_families.get(node.name) != self._family(node)
+        ]
+
+    def refit_changed(
+        self, data: pd.DataFrame, n_jobs: int = 1, sparse_cpt: bool = False
+    ) -> List[str]:
+        """
+        Fit params only of nodes returned by changed_nodes,
+        distributions of other nodes are kept.
+
+        data: data to fit changed nodes
+        n_jobs: number of workers
+        sparse_cpt: discrete nodes store only observed combinations of parents
+        Returns:
+            names of refitted nodes
+        """
+        if data.isnull().values.any():
+            logger_network.error("Dataframe contains NaNs.")
+            return []
 
-        for result, node in zip(results, self.nodes):
-            self.distributions[node.name] = result
+        changed = self.changed_nodes()
+        if not changed:
+            return []
+
+        data = self._fit_data(data, inplace=False)
+        for node in changed:
+            if isinstance(node, DiscreteNode):
+                node.sparse = sparse_cpt
+
+        self.distributions.update(self._fit_nodes(changed, data, n_jobs))
+        for node in changed:
+            # statistics are kept only if partial_fit is used
+            if self._statistics:
+                self._statistics[node.name] = node.statistics(data)
+        self._mark_fitted(changed)
+        return [node.name for node in changed]
 
     def get_info(self, as_df: bool = True) -> Optional[pd.DataFrame]:
         """Return a table with name, type, parents_type, parents_names"""
@@ -638,6 +1024,7 @@ class BaseNetwork(object):
         predict: bool = False,
         parall_count: int = 1,
         filter_neg: bool = True,
+        vectorized: bool = False,
     ) -> Union[None, pd.DataFrame, List[Dict[str, Union[str, int, float]]]]:
         """
         Sampling from Bayesian Network
@@ -645,6 +1032,8 @@ class BaseNetwork(object):
         evidence: values for nodes from user
         parall_count: number of threads. Defaults to 1.
         filter_neg: either filter negative vals or not.
+        vectorized: sample column by column, drawing all n values of a node at once
+        (in topological order) instead of walking the network for every row.
         """
         from joblib import Parallel, delayed
 
@@ -660,10 +1049,12 @@ class BaseNetwork(object):
                     if not (isinstance(evidence[node.name], str)):
                         evidence[node.name] = str(int(evidence[node.name]))
 
+        order = self.topological_order()
+
         def wrapper():
             output = {}
-            for node in self.nodes:
-                parents = node.cont_parents + node.disc_parents
+            for node in order:
+                parents = node.parents
                 if evidence and node.name in evidence.keys():
                     output[node.name] = evidence[node.name]
                 else:
@@ -679,32 +1070,16 @@ class BaseNetwork(object):
                         if any(pd.isnull(pvalue) for pvalue in pvals):
                             output[node.name] = np.nan
                             continue
-                    node_data = self.distributions[node.name]
-                    if models_dir and ("hybcprob" in node_data.keys()):
-                        for obj, obj_data in node_data["hybcprob"].items():
-                            if "serialization" in obj_data.keys():
-                                if "gaussian" in node.type.lower():
-                                    model_type = "regressor"
-                                else:
-                                    model_type = "classifier"
-                                if (
-                                    obj_data["serialization"] == "joblib"
-                                    and obj_data[f"{model_type}_obj"]
-                                ):
-                                    new_path = (
-                                        models_dir
-                                        + f"\\{node.name.replace(' ', '_')}\\{obj}.joblib.compressed"
-                                    )
-                                    node_data["hybcprob"][obj][
-                                        f"{model_type}_obj"
-                                    ] = new_path
+                    node_data = self._get_node_data(node, models_dir)
                     if predict:
                         output[node.name] = node.predict(node_data, pvals=pvals)
                     else:
                         output[node.name] = node.choose(node_data, pvals=pvals)
             return output
 
-        if predict:
+        if vectorized:
+            seq = None
+        elif predict:
             seq = []
             for _ in tqdm(range(n), position=0, leave=True):
                 result = wrapper()
@@ -722,7 +1097,12 @@ class BaseNetwork(object):
         #     result = wrapper()
         #     seq.append(result)
 
-        seq_df = pd.DataFrame.from_dict(seq, orient="columns")
+        if seq is None:
+            seq_df = self._sample_columns(
+                n, evidence, models_dir, progress_bar, predict
+            )
+        else:
+            seq_df = pd.DataFrame.from_dict(seq, orient="columns")
         seq_df.dropna(inplace=True)
         cont_nodes = [
             c.name
@@ -752,12 +1132,147 @@ class BaseNetwork(object):
         else:
             return seq
 
+    def _get_node_data(self, node: Type[BaseNode], models_dir: Optional[str]):
+        """
+        Get node's distribution, pointing joblib-serialized models to models_dir if it is given.
+        """
+        node_data = self.distributions[node.name]
+        if models_dir and ("hybcprob" in node_data.keys()):
+            for obj, obj_data in node_data["hybcprob"].items():
+                if "serialization" in obj_data.keys():
+                    if "gaussian" in node.type.lower():
+                        model_type = "regressor"
+                    else:
+                        model_type = "classifier"
+                    if (
+                        obj_data["serialization"] == "joblib"
+                        and obj_data[f"{model_type}_obj"]
+                    ):
+                        new_path = (
+                            models_dir
+                            + f"\\{node.name.replace(' ', '_')}\\{obj}.joblib.compressed"
+                        )
+                        node_data["hybcprob"][obj][f"{model_type}_obj"] = new_path
+        return node_data
+
+    def _sample_columns(
+        self,
+        n: int,
+        evidence: Optional[Dict[str, Union[str, int, float]]],
+        models_dir: Optional[str],
+        progress_bar: bool,
+        predict: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Ancestral sampling by columns: nodes are visited in topological order and
+        all n values of a node are drawn at once given already sampled parent columns.
+        If predict is True, nodes' batch predictions are used instead of draws.
+        """
+        columns = {}
+        nodes = self.topological_order()
+        nodes = tqdm(nodes, position=0, leave=True) if progress_bar else nodes
+        for node in nodes:
+            if self.descriptor["types"][node.name] == "cont":
+                column = np.full(n, np.nan)
+            else:
+                column = np.full(n, np.nan, dtype=object)
+
+            if evidence and node.name in evidence.keys():
+                column[:] = evidence[node.name]
+                columns[node.name] = column
+                continue
+
+            parents = node.parents
+            pvals = np.empty((n, len(parents)), dtype=object)
+            for i, parent in enumerate(parents):
+                if self.type == "Discrete":
+                    pvals[:, i] = columns[parent].astype(str)
+                else:
+                    pvals[:, i] = columns[parent]
+
+            # If any nan from parents, sampling from node blocked.
+            mask = ~pd.isnull(pvals).any(axis=1)
+            node_data = self._get_node_data(node, models_dir)
+            if predict:
+                try:
+                    column[mask] = node.predict_batch(node_data, pvals=pvals[mask])
+                except Exception as ex:
+                    # find failed rows one by one, they stay nan
+                    logger_network.error(ex)
+                    for i in np.flatnonzero(mask):
+                        try:
+                            column[i] = node.predict_batch(
+                                node_data, pvals=pvals[i : i + 1]
+                            )[0]
+                        except Exception:
+                            continue
+            else:
+                column[mask] = node.choose_batch(node_data, pvals=pvals[mask])
+            columns[node.name] = column
+        return pd.DataFrame(columns)
+
+    def _predict_columns(
+        self,
+        test: pd.DataFrame,
+        columns: List[str],
+        models_dir: Optional[str],
+        progress_bar: bool,
+    ) -> Dict[str, Union[List[str], List[int], List[float]]]:
+        """
+        Batched prediction: every row of test is an evidence and all rows are propagated
+        through the network at once with nodes' predict_batch.
+        Rows which sample(predict=True) would drop (nan or negative values in positive columns)
+        get nan predictions.
+        """
+        evidence = {}
+        for node in self.nodes:
+            if node.name not in test.columns:
+                continue
+            values = test[node.name].to_numpy(dtype=object)
+            if node.type == "Discrete":
+                values = np.array(
+                    [v if isinstance(v, str) else str(int(v)) for v in values],
+                    dtype=object,
+                )
+            evidence[node.name] = values
+
+        seq_df = self._sample_columns(
+            test.shape[0], evidence, models_dir, progress_bar, predict=True
+        )
+
+        valid = ~seq_df.isnull().any(axis=1)
+        positive_columns = [
+            c.name
+            for c in self.nodes
+            if type(c).__name__
+            not in (
+                "DiscreteNode",
+                "LogitNode",
+                "CompositeDiscreteNode",
+                "ConditionalLogitNode",
+            )
+            and self.descriptor["signs"][c.name] == "pos"
+        ]
+        valid &= (seq_df[positive_columns] >= 0).all(axis=1)
+
+        predicted = seq_df.loc[valid]
+        if type(self).__name__ == "CompositeBN":
+            predicted = self._decode_categorical_data(predicted)
+
+        preds = {}
+        for key in columns:
+            column = pd.Series(np.nan, index=seq_df.index, dtype=object)
+            column[valid] = predicted[key]
+            preds[key] = column.to_list()
+        return preds
+
     def predict(
         self,
         test: pd.DataFrame,
         parall_count: int = 1,
         progress_bar: bool = True,
         models_dir: Optional[str] = None,
+        vectorized: bool = False,
     ) -> Dict[str, Union[List[str], List[int], List[float]]]:
         """
         Function to predict columns from given data.
@@ -768,6 +1283,8 @@ class BaseNetwork(object):
             test (pd.DataFrame): test dataset
             parall_count (int, optional):number of threads. Defaults to 1.
             progress_bar: verbose mode.
+            vectorized: propagate all test rows through the network at once
+            (in topological order) instead of sampling the network for every row and column.
 
         Returns:
             predicted data (dict): dict with column as key and predicted data as value
@@ -819,6 +1336,9 @@ class BaseNetwork(object):
             logger_network.error("Test data is the same as train.")
             return {}
 
+        if vectorized:
+            return self._predict_columns(test, columns, models_dir, progress_bar)
+
         preds = {column_name: list() for column_name in columns}
 
         if progress_bar:
@@ -865,7 +1385,7 @@ class BaseNetwork(object):
         """
 
         for node in self.nodes:
-            if "Gaussian" in node.type:
+            if "Gaussian" in node.type and "Mixture" not in node.type:
                 if node.name in regressors.keys():
                     node.regressor = regressors[node.name]
                     node.type = re.sub(
@@ -927,40 +1447,45 @@ class BaseNetwork(object):
     def fill_gaps(self, df: pd.DataFrame, **kwargs):
         """
         Fill NaNs with sampled values.
+        Rows are grouped by their pattern of NaNs and every group is filled by one batched prediction.
+        Passed DataFrame is not changed.
 
         :param df: dataframe with NaNs
-        :param kwargs: the same params as bn.predict
+        :param kwargs: the same params as bn.predict (vectorized defaults to True)
 
         :return df, failed: filled DataFrame and list of failed rows (sometimes predict can return np.nan)
         """
         if not self.distributions:
             logger_network.error("To call this method you must train parameters.")
 
-        # create a mimic row to get a dataframe from iloc method
-        list = [np.nan for _ in range(df.shape[1])]
-        df.loc["mimic"] = list
+        kwargs.setdefault("vectorized", True)
+        df = df.copy()
 
-        def fill_row(df, i):
-            row = df.iloc[[i, -1], :].drop(["mimic"], axis=0)
+        missing = df.isna().to_numpy()
+        positions = np.flatnonzero(missing.any(axis=1))
+        patterns, inverse = np.unique(missing[positions], axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
 
-            evidences = row.dropna(axis=1)
+        failed_mask = np.zeros(df.shape[0], dtype=bool)
+        for k, pattern in enumerate(patterns):
+            rows = positions[inverse == k]
+            evidences = df.iloc[rows, np.flatnonzero(~pattern)]
+            result = self.predict(evidences, progress_bar=False, **kwargs)
+            if not result:
+                continue
 
-            return row.index[0], self.predict(evidences, progress_bar=False, **kwargs)
+            result = pd.DataFrame(result)
+            row_failed = result.isna().any(axis=1).to_numpy()
+            failed_mask[rows[row_failed]] = True
+            for column in result.columns:
+                if column not in df.columns:
+                    df[column] = np.nan
+                df.iloc[rows[~row_failed], df.columns.get_loc(column)] = result[
+                    column
+                ].to_numpy()[~row_failed]
 
-        failed = []
-        for index in range(df.shape[0] - 1):
-            if df.iloc[index].isna().any():
-                true_pos, result = fill_row(df, index)
-                if any(pd.isna(v[0]) for v in result.values()):
-                    failed.append(true_pos)
-                    continue
-                else:
-                    for column, value in result.items():
-                        df.loc[true_pos, column] = value[0]
-            else:
-                continue
-        df.drop(failed, inplace=True)
-        return df.drop(["mimic"]), failed
+        failed = df.index[failed_mask].to_list()
+        return df[~failed_mask], failed
 
     def get_dist(self, node_name: str, pvals: Optional[dict] = None):
         """
@@ -974,7 +1499,7 @@ class BaseNetwork(object):
             return
         node = self[node_name]
 
-        parents = node.cont_parents + node.disc_parents
+        parents = node.parents
         if not parents:
             return self.distributions[node_name]
 
@@ -1,36 +1,97 @@
-from bamt.utils.MathUtils import get_brave_matrix, get_proximity_matrix
+import numpy as np
+from scipy import sparse
+
+from bamt.utils.MathUtils import (
+    approximate_n_nearest,
+    get_brave_matrix,
+    get_proximity_matrix,
+    get_sparse_brave_matrix,
+)
 
 
 class BigBraveBN:
-    def __init__(self, n_nearest=5, threshold=0.3, proximity_metric="MI"):
+    def __init__(
+        self,
+        n_nearest=5,
+        threshold=0.3,
+        proximity_metric="MI",
+        n_jobs=1,
+        approximate=False,
+        n_candidates=None,
+        random_state=None,
+    ):
+        """
+        approximate: find nearest neighbors of columns with random projection sketches
+        and refine only candidates with exact proximity, instead of computing full
+        proximity matrix (for data with thousands of columns)
+        n_candidates: number of candidates per column in approximate mode
+        random_state: seed of sketches in approximate mode
+        """
         self.n_nearest = n_nearest
         self.threshold = threshold
         self.proximity_metric = proximity_metric
+        self.n_jobs = n_jobs
+        self.approximate = approximate
+        self.n_candidates = n_candidates
+        self.random_state = random_state
         self.possible_edges = []
 
-    def set_possible_edges_by_brave(self, df):
-        """Returns list of possible edges for structure learning
+    def get_brave_matrix(self, df) -> sparse.csr_matrix:
+        """Brave coefficients of pairs of columns, sparse in approximate mode
+        (only pairs sharing a neighbourhood are stored)
 
         Args:
             df (DataFrame): data
 
         Returns:
-            Possible edges: list of possible edges
+            brave_matrix: sparse matrix, rows and columns follow df.columns
         """
+        if self.approximate:
+            groups = approximate_n_nearest(
+                df,
+                proximity_metric=self.proximity_metric,
+                number_close=self.n_nearest,
+                n_candidates=self.n_candidates,
+                random_state=self.random_state,
+            )
+            return get_sparse_brave_matrix(df.columns, groups)
 
         proximity_matrix = get_proximity_matrix(
-            df, proximity_metric=self.proximity_metric
+            df, proximity_metric=self.proximity_metric, n_jobs=self.n_jobs
         )
         brave_matrix = get_brave_matrix(df.columns, proximity_matrix, self.n_nearest)
+        return sparse.csr_matrix(brave_matrix.values)
 
-        possible_edges_list = []
+    def set_possible_edges_by_brave(self, df):
+        """Returns list of possible edges for structure learning
 
-        for c1 in df.columns:
-            for c2 in df.columns:
-                if (
-                    brave_matrix.loc[c1, c2]
-                    > brave_matrix.max(numeric_only=True).max() * self.threshold
-                ):
-                    possible_edges_list.append((c1, c2))
+        Args:
+            df (DataFrame): data
 
-        self.possible_edges = possible_edges_list
+        Returns:
+            Possible edges: list of possible edges
+        """
+        brave_matrix = self.get_brave_matrix(df).tocoo()
+        if not brave_matrix.nnz:
+            self.possible_edges = []
+            return
+
+        selected = brave_matrix.data > brave_matrix.data.max() * self.threshold
+        rows, cols = brave_matrix.row[selected], brave_matrix.col[selected]
+        order = np.lexsort((cols, rows))
+
+        self.possible_edges = [
+            (df.columns[i], df.columns[j]) for i, j in zip(rows[order], cols[order])
+        ]
+
+    def get_candidate_parents(self) -> dict:
+        """Possible edges as candidate parents of nodes (candidate_parents param
+        of structure learning), set_possible_edges_by_brave must be called first
+
+        Returns:
+            dict {node: list of possible parents}
+        """
+        candidates = {}
+        for parent, child in self.possible_edges:
+            candidates.setdefault(child, []).append(parent)
+        return candidates
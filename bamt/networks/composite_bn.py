@@ -91,7 +91,7 @@ class CompositeBN(BaseNetwork):
         classifiers: dict with node_name and Classifier
         """
         for node in self.nodes:
-            if node.name in classifiers.keys():
+            if node.name in classifiers.keys() and hasattr(node, "classifier"):
                 node.classifier = classifiers[node.name]
                 node.type = re.sub(
                     r"\([\s\S]*\)", f"({type(node.classifier).__name__})", node.type
@@ -105,7 +105,7 @@ class CompositeBN(BaseNetwork):
         classifiers: dict with node_name and regressors
         """
         for node in self.nodes:
-            if node.name in regressors.keys():
+            if node.name in regressors.keys() and hasattr(node, "regressor"):
                 node.regressor = regressors[node.name]
                 node.type = re.sub(
                     r"\([\s\S]*\)", f"({type(node.regressor).__name__})", node.type
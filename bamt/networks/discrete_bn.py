@@ -1,4 +1,10 @@
+from typing import Dict, List, Optional, Sequence, Union
+
 from .base import BaseNetwork
+from bamt.inference.factor import cpt_factor
+from bamt.inference.junction_tree import JunctionTree
+from bamt.inference.variable_elimination import VariableElimination
+from bamt.log import logger_network
 
 
 class DiscreteBN(BaseNetwork):
@@ -13,3 +19,110 @@ class DiscreteBN(BaseNetwork):
         self._allowed_dtypes = ["disc", "disc_num"]
         self.has_logit = None
         self.use_mixture = None
+        self._junction_tree = ([], None)
+
+    def _inference_model(self):
+        """
+        CPT factors and states of all nodes from fitted distributions.
+        """
+        states = {
+            node.name: self.distributions[node.name]["vals"] for node in self.nodes
+        }
+        factors = {
+            node.name: cpt_factor(node, self.distributions[node.name], states)
+            for node in self.nodes
+        }
+        return factors, states
+
+    def junction_tree(self) -> JunctionTree:
+        """
+        Junction tree compiled from fitted cprob tables.
+        It is cached and rebuilt only when parents or cprob of some node are replaced,
+        so repeated queries reuse calibrated cliques.
+        """
+        key = [
+            (
+                node.name,
+                node.disc_parents + node.cont_parents,
+                self.distributions[node.name]["cprob"],
+            )
+            for node in self.nodes
+        ]
+        cached_key, tree = self._junction_tree
+        if len(cached_key) != len(key) or any(
+            a[0] != b[0] or a[1] != b[1] or a[2] is not b[2]
+            for a, b in zip(cached_key, key)
+        ):
+            tree = JunctionTree(*self._inference_model())
+            self._junction_tree = (key, tree)
+        return tree
+
+    @staticmethod
+    def _evidence(evidence: Optional[Dict[str, Union[str, int]]]) -> Dict[str, str]:
+        evidence = dict(evidence or {})
+        for name, value in evidence.items():
+            if not isinstance(value, str):
+                evidence[name] = str(int(value))
+        return evidence
+
+    def query(
+        self,
+        variables: Sequence[str],
+        evidence: Optional[Dict[str, Union[str, int]]] = None,
+        method: str = "junction_tree",
+    ) -> Optional[Dict[str, Dict[str, float]]]:
+        """
+        Exact posterior marginals of variables given evidence.
+        Unlike predict, evidence on descendants is taken into account.
+
+        Args:
+            variables: names of query nodes
+            evidence: observed values, {node: value}
+            method: "junction_tree" (cached, fast for repeated queries) or "variable_elimination"
+
+        Returns:
+            dict {node: {value: probability}}
+        """
+        if not self.distributions:
+            logger_network.error(
+                "Parameter learning wasn't done. Call fit_parameters method"
+            )
+            return None
+
+        tree = self.junction_tree()
+        if method == "junction_tree":
+            engine = tree
+        elif method == "variable_elimination":
+            engine = VariableElimination(tree.factors, tree.states)
+        else:
+            logger_network.error(f"Inference method {method} is not supported")
+            return None
+
+        marginals = engine.query(variables, self._evidence(evidence))
+        return {
+            name: dict(zip(engine.states[name], factor.values.tolist()))
+            for name, factor in marginals.items()
+        }
+
+    def map_query(
+        self,
+        variables: Optional[List[str]] = None,
+        evidence: Optional[Dict[str, Union[str, int]]] = None,
+    ) -> Optional[Dict[str, str]]:
+        """
+        Most probable joint values of variables given evidence (other nodes are summed out).
+
+        Args:
+            variables: names of query nodes, all unobserved nodes by default
+            evidence: observed values, {node: value}
+
+        Returns:
+            dict {node: value}
+        """
+        if not self.distributions:
+            logger_network.error(
+                "Parameter learning wasn't done. Call fit_parameters method"
+            )
+            return None
+
+        return self.junction_tree().map_query(variables, self._evidence(evidence))
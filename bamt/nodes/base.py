@@ -1,30 +1,104 @@
 import pickle
-from typing import Union
+from ast import literal_eval
+from typing import List, Optional, Union
+
+import numpy as np
+from pandas import factorize
+
+
+class LazyCombinations(dict):
+    """
+    hybcprob of conditional nodes: params are stored only for combinations
+    of discrete parents that occur in data. Other combinations of known parents values
+    get a copy of default (empty) params on first access, unknown values raise KeyError.
+    """
+
+    def __init__(self, params=(), default=None):
+        super(LazyCombinations, self).__init__(params)
+        self.default = default or {}
+        self._categories = None
+
+    def categories(self) -> List[set]:
+        """
+        Values of every discrete parent, collected from stored combinations.
+        """
+        if self._categories is None:
+            combinations = [literal_eval(key) for key in self.keys()]
+            self._categories = [set(values) for values in zip(*combinations)]
+        return self._categories
+
+    def __missing__(self, key: str):
+        try:
+            comb = literal_eval(key)
+        except (ValueError, SyntaxError):
+            raise KeyError(key)
+        categories = self.categories()
+        if (
+            not self
+            or not isinstance(comb, list)
+            or len(comb) != len(categories)
+            or any(value not in values for value, values in zip(comb, categories))
+        ):
+            raise KeyError(key)
+        value = self[key] = dict(self.default)
+        return value
 
 
 class BaseNode(object):
     """
     Base class for nodes.
+    Nodes use __slots__ to stay small in networks with thousands of nodes,
+    subclasses declare slots for their own attributes.
     """
 
+    __slots__ = (
+        "name",
+        "type",
+        "_disc_parents",
+        "_cont_parents",
+        "parents",
+        "children",
+    )
+
     def __init__(self, name: str):
         """
         :param name: name for node (taken from column name)
         type: node type
         disc_parents: list with discrete parents
         cont_parents: list with continuous parents
+        parents: tuple of continuous and discrete parents, kept in sync with them
         children: node's children
         """
         self.name = name
         self.type = "abstract"
 
-        self.disc_parents = []
-        self.cont_parents = []
+        self._disc_parents = []
+        self._cont_parents = []
+        self.parents = ()
         self.children = []
 
     def __repr__(self):
         return f"{self.name}"
 
+    # parents lists must be assigned, not changed in place, to keep parents tuple valid
+    @property
+    def disc_parents(self) -> List[str]:
+        return self._disc_parents
+
+    @disc_parents.setter
+    def disc_parents(self, parents: List[str]):
+        self._disc_parents = list(parents)
+        self.parents = tuple(self._cont_parents + self._disc_parents)
+
+    @property
+    def cont_parents(self) -> List[str]:
+        return self._cont_parents
+
+    @cont_parents.setter
+    def cont_parents(self, parents: List[str]):
+        self._cont_parents = list(parents)
+        self.parents = tuple(self._cont_parents + self._disc_parents)
+
     def __eq__(self, other):
         if not isinstance(other, BaseNode):
             # don't attempt to compare against unrelated types
@@ -57,3 +131,112 @@ class BaseNode(object):
     @staticmethod
     def get_dist(node_info, pvals):
         pass
+
+    def statistics(self, data) -> Optional[dict]:
+        """
+        Sufficient statistics of node's params on data.
+        None means params can't be updated incrementally and node must be refitted.
+        """
+        return None
+
+    @staticmethod
+    def merge_statistics(statistics: dict, other: dict) -> dict:
+        """
+        Statistics of union of two datasets.
+        """
+        raise NotImplementedError
+
+    def from_statistics(self, statistics: dict):
+        """
+        Params of node (as fit_parameters returns) from sufficient statistics.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def sample_indices(probas: np.ndarray) -> np.ndarray:
+        """
+        Draw one index per row from a matrix of row-wise distributions.
+        probas: array (n, number of values)
+        """
+        cumulative_dist = np.cumsum(probas, axis=1)
+        rand = np.random.random((probas.shape[0], 1))
+        indices = (cumulative_dist < rand).sum(axis=1)
+        return np.minimum(indices, probas.shape[1] - 1)
+
+    @staticmethod
+    def _combinations(pvals: np.ndarray):
+        """
+        Factorize rows of parent values.
+        Returns list of unique combinations (as lists of str) and index of combination for every row.
+        """
+        codes = []
+        uniques = []
+        for column in pvals.T:
+            column_codes, column_uniques = factorize(column)
+            codes.append(column_codes)
+            uniques.append(column_uniques)
+        shape = [max(len(u), 1) for u in uniques]
+        flat = np.ravel_multi_index(codes, shape)
+        unique_flat, inverse = np.unique(flat, return_inverse=True)
+        combinations = [
+            [str(uniques[j][code]) for j, code in enumerate(index)]
+            for index in zip(*np.unravel_index(unique_flat, shape))
+        ]
+        return combinations, inverse
+
+    def _group_rows(self, pvals: np.ndarray):
+        """
+        Split rows by combination of discrete parents values.
+        Yields combination (list of str) and indexes of rows with that combination.
+        """
+        if not pvals.shape[1]:
+            yield [], np.arange(pvals.shape[0])
+            return
+        combinations, inverse = self._combinations(pvals)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(combinations)))[:-1]
+        for comb, rows in zip(combinations, np.split(order, bounds)):
+            yield comb, rows
+
+    def _fit_groups(self, data):
+        """
+        Split data by combinations of discrete parents values occurring in it.
+        Yields key of combination in hybcprob and rows of data with that combination.
+        """
+        pvals = data[self.disc_parents].values
+        for comb, rows in self._group_rows(pvals):
+            if len(rows):
+                yield str(comb), data.iloc[rows]
+
+    @staticmethod
+    def empty_params() -> dict:
+        """
+        Params of combination of discrete parents that never occurred in data.
+        """
+        return {}
+
+    def choose_batch(self, node_info, pvals: np.ndarray) -> np.ndarray:
+        """
+        Return n values from node, one for every row of parent values.
+        Default implementation calls choose row by row.
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values in cont_parents + disc_parents order
+        """
+        output = np.empty(pvals.shape[0], dtype=object)
+        for i, row in enumerate(pvals):
+            output[i] = self.choose(node_info, pvals=list(row) if len(row) else None)
+        return output
+
+    def predict_batch(self, node_info, pvals: np.ndarray) -> np.ndarray:
+        """
+        Return n predictions from node, one for every row of parent values.
+        Default implementation calls predict row by row.
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values in cont_parents + disc_parents order
+        """
+        output = np.empty(pvals.shape[0], dtype=object)
+        for i, row in enumerate(pvals):
+            output[i] = self.predict(node_info, pvals=list(row) if len(row) else None)
+        return output
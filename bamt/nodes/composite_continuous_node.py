@@ -9,6 +9,8 @@ NodeInfo = Union[GaussianParams, HybcprobParams]
 
 
 class CompositeContinuousNode(GaussianNode):
+    __slots__ = ()
+
     def __init__(self, name, regressor: Optional[object] = None):
         super(CompositeContinuousNode, self).__init__(name)
         if regressor is None:
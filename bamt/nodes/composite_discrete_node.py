@@ -10,6 +10,8 @@ class CompositeDiscreteNode(LogitNode):
     Class for composite discrete node.
     """
 
+    __slots__ = ()
+
     def __init__(self, name, classifier: Optional[object] = None):
         super(CompositeDiscreteNode, self).__init__(name)
         if classifier is None:
@@ -1,4 +1,3 @@
-import itertools
 import math
 import random
 from typing import Dict, Optional, List, Union
@@ -9,7 +8,7 @@ from sklearn import linear_model
 from sklearn.base import clone
 from sklearn.metrics import mean_squared_error as mse
 
-from .base import BaseNode
+from .base import BaseNode, LazyCombinations
 from .schema import CondGaussParams
 
 
@@ -18,6 +17,8 @@ class ConditionalGaussianNode(BaseNode):
     Main class for Conditional Gaussian Node
     """
 
+    __slots__ = ("regressor",)
+
     def __init__(self, name, regressor: Optional[object] = None):
         super(ConditionalGaussianNode, self).__init__(name)
         if regressor is None:
@@ -30,57 +31,44 @@ class ConditionalGaussianNode(BaseNode):
         Train params for Conditional Gaussian Node.
         Return:
         {"hybcprob": {<combination of outputs from discrete parents> : CondGaussParams}}
+        Only combinations occurring in data are fitted, the others get empty params on first access.
         """
-        hycprob = dict()
-        values = []
-        combinations = []
-        for d_p in self.disc_parents:
-            values.append(np.unique(data[d_p].values))
-        for xs in itertools.product(*values):
-            combinations.append(list(xs))
-        for comb in combinations:
-            mask = np.full(len(data), True)
-            for col, val in zip(self.disc_parents, comb):
-                mask = (mask) & (data[col] == val)
-            new_data = data[mask]
-            key_comb = [str(x) for x in comb]
-            if new_data.shape[0] > 0:
-                if self.cont_parents:
-                    model = clone(self.regressor)
-                    model.fit(
-                        new_data[self.cont_parents].values, new_data[self.name].values
-                    )
-                    predicted_value = model.predict(new_data[self.cont_parents].values)
-                    variance = mse(
-                        new_data[self.name].values, predicted_value, squared=False
-                    )
-                    hycprob[str(key_comb)] = {
-                        "variance": variance,
-                        "mean": np.nan,
-                        "regressor_obj": model,
-                        "regressor": type(self.regressor).__name__,
-                        "serialization": None,
-                    }
-                else:
-                    mean_base = np.mean(new_data[self.name].values)
-                    variance = np.var(new_data[self.name].values)
-                    hycprob[str(key_comb)] = {
-                        "variance": variance,
-                        "mean": mean_base,
-                        "regressor_obj": None,
-                        "regressor": None,
-                        "serialization": None,
-                    }
+        hycprob = LazyCombinations(default=self.empty_params())
+        for key_comb, new_data in self._fit_groups(data):
+            if self.cont_parents:
+                model = clone(self.regressor)
+                model.fit(new_data[self.cont_parents].values, new_data[self.name].values)
+                predicted_value = model.predict(new_data[self.cont_parents].values)
+                variance = mse(new_data[self.name].values, predicted_value, squared=False)
+                hycprob[key_comb] = {
+                    "variance": variance,
+                    "mean": np.nan,
+                    "regressor_obj": model,
+                    "regressor": type(self.regressor).__name__,
+                    "serialization": None,
+                }
             else:
-                hycprob[str(key_comb)] = {
-                    "variance": np.nan,
-                    "regressor": None,
+                mean_base = np.mean(new_data[self.name].values)
+                variance = np.var(new_data[self.name].values)
+                hycprob[key_comb] = {
+                    "variance": variance,
+                    "mean": mean_base,
                     "regressor_obj": None,
+                    "regressor": None,
                     "serialization": None,
-                    "mean": np.nan,
                 }
         return {"hybcprob": hycprob}
 
+    @staticmethod
+    def empty_params() -> CondGaussParams:
+        return {
+            "variance": np.nan,
+            "regressor": None,
+            "regressor_obj": None,
+            "serialization": None,
+            "mean": np.nan,
+        }
+
     def get_dist(self, node_info, pvals):
         dispvals = []
         lgpvals = []
@@ -133,6 +121,50 @@ class ConditionalGaussianNode(BaseNode):
 
         return random.gauss(cond_mean, variance)
 
+    def choose_batch(
+        self, node_info: Dict[str, Dict[str, CondGaussParams]], pvals: np.ndarray
+    ) -> np.ndarray:
+        """
+        Return n values from ConditionalGaussian node,
+        one regressor call for every combination of discrete parents
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values in cont_parents + disc_parents order
+        """
+        cond_mean, variance = self._batch_dist(node_info, pvals)
+        return np.random.normal(cond_mean, variance)
+
+    def predict_batch(
+        self, node_info: Dict[str, Dict[str, CondGaussParams]], pvals: np.ndarray
+    ) -> np.ndarray:
+        """
+        Return n predictions from ConditionalGaussian node,
+        one regressor call for every combination of discrete parents
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values in cont_parents + disc_parents order
+        """
+        cond_mean, _ = self._batch_dist(node_info, pvals)
+        return cond_mean
+
+    def _batch_dist(self, node_info, pvals: np.ndarray):
+        n_cont = len(self.cont_parents)
+        lgpvals = np.asarray(pvals[:, :n_cont], dtype=float)
+        cond_mean = np.full(pvals.shape[0], np.nan)
+        variance = np.full(pvals.shape[0], np.nan)
+
+        for comb, rows in self._group_rows(pvals[:, n_cont:]):
+            lgdistribution = node_info["hybcprob"][str(comb)]
+            if self.cont_parents:
+                if lgdistribution["regressor"]:
+                    model = lgdistribution["regressor_obj"]
+                    cond_mean[rows] = model.predict(lgpvals[rows])
+                    variance[rows] = lgdistribution["variance"]
+            else:
+                cond_mean[rows] = lgdistribution["mean"]
+                variance[rows] = math.sqrt(lgdistribution["variance"])
+        return cond_mean, variance
+
     def predict(
         self,
         node_info: Dict[str, Dict[str, CondGaussParams]],
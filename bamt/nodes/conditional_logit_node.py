@@ -1,4 +1,3 @@
-import itertools
 import random
 from typing import Optional, List, Union, Dict
 
@@ -7,7 +6,7 @@ from pandas import DataFrame
 from sklearn import linear_model
 from sklearn.base import clone
 
-from .base import BaseNode
+from .base import BaseNode, LazyCombinations
 from .schema import LogitParams
 
 
@@ -16,6 +15,8 @@ class ConditionalLogitNode(BaseNode):
     Main class for Conditional Logit Node
     """
 
+    __slots__ = ("classifier",)
+
     def __init__(self, name: str, classifier: Optional[object] = None):
         super(ConditionalLogitNode, self).__init__(name)
         if classifier is None:
@@ -30,55 +31,42 @@ class ConditionalLogitNode(BaseNode):
         Train params on data
         Return:
         {"hybcprob": {<combination of outputs from discrete parents> : LogitParams}}
+        Only combinations occurring in data are fitted, the others get empty params on first access.
         """
-        hycprob = dict()
-        values = []
-        combinations = []
-        for d_p in self.disc_parents:
-            values.append(np.unique(data[d_p].values))
-        for xs in itertools.product(*values):
-            combinations.append(list(xs))
-        for comb in combinations:
-            mask = np.full(len(data), True)
-            for col, val in zip(self.disc_parents, comb):
-                mask = (mask) & (data[col] == val)
-            new_data = data[mask]
-            # mean_base = [np.nan]
-            classes = [np.nan]
-            key_comb = [str(x) for x in comb]
-            if new_data.shape[0] != 0:
-                model = clone(self.classifier)
-                values = set(new_data[self.name])
-                if len(values) > 1:
-                    model.fit(
-                        X=new_data[self.cont_parents].values,
-                        y=new_data[self.name].values,
-                    )
-                    classes = list(model.classes_)
-                    hycprob[str(key_comb)] = {
-                        "classes": classes,
-                        "classifier_obj": model,
-                        "classifier": type(self.classifier).__name__,
-                        "serialization": None,
-                    }
-                else:
-                    classes = list(values)
-                    hycprob[str(key_comb)] = {
-                        "classes": classes,
-                        "classifier": type(self.classifier).__name__,
-                        "classifier_obj": None,
-                        "serialization": None,
-                    }
-
+        hycprob = LazyCombinations(default=self.empty_params())
+        for key_comb, new_data in self._fit_groups(data):
+            model = clone(self.classifier)
+            values = set(new_data[self.name])
+            if len(values) > 1:
+                model.fit(
+                    X=new_data[self.cont_parents].values,
+                    y=new_data[self.name].values,
+                )
+                classes = list(model.classes_)
+                hycprob[key_comb] = {
+                    "classes": classes,
+                    "classifier_obj": model,
+                    "classifier": type(self.classifier).__name__,
+                    "serialization": None,
+                }
             else:
-                hycprob[str(key_comb)] = {
-                    "classes": list(classes),
+                classes = list(values)
+                hycprob[key_comb] = {
+                    "classes": classes,
                     "classifier": type(self.classifier).__name__,
                     "classifier_obj": None,
                     "serialization": None,
                 }
         return {"hybcprob": hycprob}
 
+    def empty_params(self) -> LogitParams:
+        return {
+            "classes": [np.nan],
+            "classifier": type(self.classifier).__name__,
+            "classifier_obj": None,
+            "serialization": None,
+        }
+
     @staticmethod
     def get_dist(node_info, pvals, **kwargs):
         dispvals = []
@@ -140,6 +128,53 @@ class ConditionalLogitNode(BaseNode):
         else:
             return str(lgdistribution["classes"][0])
 
+    def choose_batch(
+        self, node_info: Dict[str, Dict[str, LogitParams]], pvals: np.ndarray
+    ) -> np.ndarray:
+        """
+        Return n values from ConditionalLogit node,
+        one classifier call for every combination of discrete parents
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values in cont_parents + disc_parents order
+        """
+        n_cont = len(self.cont_parents)
+        lgpvals = np.asarray(pvals[:, :n_cont], dtype=float)
+        output = np.empty(pvals.shape[0], dtype=object)
+        for comb, rows in self._group_rows(pvals[:, n_cont:]):
+            lgdistribution = node_info["hybcprob"][str(comb)]
+            classes = np.array([str(c) for c in lgdistribution["classes"]], dtype=object)
+            if len(classes) > 1:
+                model = lgdistribution["classifier_obj"]
+                distribution = model.predict_proba(lgpvals[rows])
+                output[rows] = classes[self.sample_indices(distribution)]
+            else:
+                output[rows] = classes[0]
+        return output
+
+    def predict_batch(
+        self, node_info: Dict[str, Dict[str, LogitParams]], pvals: np.ndarray
+    ) -> np.ndarray:
+        """
+        Return n predictions from ConditionalLogit node,
+        one classifier call for every combination of discrete parents
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values in cont_parents + disc_parents order
+        """
+        n_cont = len(self.cont_parents)
+        lgpvals = np.asarray(pvals[:, :n_cont], dtype=float)
+        output = np.empty(pvals.shape[0], dtype=object)
+        for comb, rows in self._group_rows(pvals[:, n_cont:]):
+            lgdistribution = node_info["hybcprob"][str(comb)]
+            if len(lgdistribution["classes"]) > 1:
+                model = lgdistribution["classifier_obj"]
+                pred = model.predict(lgpvals[rows])
+                output[rows] = [str(p) for p in np.ravel(pred)]
+            else:
+                output[rows] = str(lgdistribution["classes"][0])
+        return output
+
     @staticmethod
     def predict(
         node_info: Dict[str, Dict[str, LogitParams]], pvals: List[Union[str, float]]
@@ -1,12 +1,11 @@
-import itertools
 from typing import Union, List, Optional, Dict
 
 import numpy as np
 from gmr import GMM
 from pandas import DataFrame
 
-from bamt.utils.MathUtils import component
-from .base import BaseNode
+from bamt.utils.MathUtils import CompiledMixture, compile_mixture, fit_mixture
+from .base import BaseNode, LazyCombinations
 from .schema import CondMixtureGaussParams
 
 
@@ -15,8 +14,19 @@ class ConditionalMixtureGaussianNode(BaseNode):
     Main class for Conditional Mixture Gaussian Node
     """
 
-    def __init__(self, name):
+    __slots__ = ("n_jobs", "patience", "_compiled")
+
+    def __init__(
+        self, name, n_jobs: Optional[int] = None, patience: Optional[int] = None
+    ):
+        """
+        :param n_jobs: number of threads fitting candidate numbers of components
+        :param patience: stop the search of number of components after this many
+        candidates without improvement of AIC and BIC (None - try all candidates)
+        """
         super(ConditionalMixtureGaussianNode, self).__init__(name)
+        self.n_jobs = n_jobs
+        self.patience = patience
         self.type = "ConditionalMixtureGaussian"
 
     def fit_parameters(
@@ -26,63 +36,29 @@ class ConditionalMixtureGaussianNode(BaseNode):
         Train params for Conditional Mixture Gaussian Node.
         Return:
         {"hybcprob": {<combination of outputs from discrete parents> : CondMixtureGaussParams}}
+        Only combinations occurring in data are fitted, the others get empty params on first access.
         """
-        hycprob = dict()
-        values = []
-        combinations = []
-        for d_p in self.disc_parents:
-            values.append(np.unique(data[d_p].values))
-        for xs in itertools.product(*values):
-            combinations.append(list(xs))
-        for comb in combinations:
-            mask = np.full(len(data), True)
-            for col, val in zip(self.disc_parents, comb):
-                mask = (mask) & (data[col] == val)
-            new_data = data[mask]
-            new_data.reset_index(inplace=True, drop=True)
-            key_comb = [str(x) for x in comb]
+        hycprob = LazyCombinations(default=self.empty_params())
+        for key_comb, new_data in self._fit_groups(data):
+            new_data = new_data.reset_index(drop=True)
             nodes = [self.name] + self.cont_parents
             if new_data.shape[0] > 5:
+                # n_comp = int((aic + bic) / 2), see select_mixture
                 if self.cont_parents:
-                    # component(new_data, nodes,
-                    # 'LRTS')#int((component(new_data, nodes, 'aic') +
-                    # component(new_data, nodes, 'bic')) / 2)
-                    n_comp = int(
-                        (
-                            component(new_data, nodes, "aic")
-                            + component(new_data, nodes, "bic")
-                        )
-                        / 2
-                    )
-                    # n_comp = 3
-                    gmm = GMM(n_components=n_comp).from_samples(
-                        new_data[nodes].values, n_iter=500, init_params="kmeans++"
-                    )
+                    x = new_data[nodes].values
                 else:
-                    # component(new_data, [node],
-                    # 'LRTS')#int((component(new_data, [node], 'aic') +
-                    # component(new_data, [node], 'bic')) / 2)
-                    n_comp = int(
-                        (
-                            component(new_data, [self.name], "aic")
-                            + component(new_data, [self.name], "bic")
-                        )
-                        / 2
-                    )
-                    # n_comp = 3
-                    gmm = GMM(n_components=n_comp).from_samples(
-                        np.transpose([new_data[self.name].values]),
-                        n_iter=500,
-                        init_params="kmeans++",
-                    )
+                    x = np.transpose([new_data[self.name].values])
+                gmm = fit_mixture(
+                    x, n_iter=500, n_jobs=self.n_jobs, patience=self.patience
+                )
                 means = gmm.means.tolist()
                 cov = gmm.covariances.tolist()
                 # weigts = np.transpose(gmm.to_responsibilities(np.transpose([new_data[node].values])))
                 w = gmm.priors.tolist()  # []
                 # for row in weigts:
                 #     w.append(np.mean(row))
-                hycprob[str(key_comb)] = {"covars": cov, "mean": means, "coef": w}
-            elif new_data.shape[0] != 0:
+                hycprob[key_comb] = {"covars": cov, "mean": means, "coef": w}
+            else:
                 n_comp = 1
                 gmm = GMM(n_components=n_comp)
                 if self.cont_parents:
@@ -95,24 +71,36 @@ class ConditionalMixtureGaussianNode(BaseNode):
                 w = gmm.priors.tolist()  # []
                 # for row in weigts:
                 #     w.append(np.mean(row))
-                hycprob[str(key_comb)] = {"covars": cov, "mean": means, "coef": w}
-            else:
-                if self.cont_parents:
-                    hycprob[str(key_comb)] = {
-                        "covars": np.nan,
-                        "mean": np.nan,
-                        "coef": [],
-                    }
-                else:
-                    hycprob[str(key_comb)] = {
-                        "covars": np.nan,
-                        "mean": np.nan,
-                        "coef": [],
-                    }
+                hycprob[key_comb] = {"covars": cov, "mean": means, "coef": w}
         return {"hybcprob": hycprob}
 
     @staticmethod
-    def get_dist(node_info, pvals):
+    def empty_params() -> CondMixtureGaussParams:
+        return {"covars": np.nan, "mean": np.nan, "coef": []}
+
+    def compiled_mixture(
+        self, key: str, lgdistribution: CondMixtureGaussParams
+    ) -> CompiledMixture:
+        """
+        Return mixture params of combination of discrete parents as arrays with
+        precomputed conditioning terms, rebuilt only when params are replaced.
+        """
+        if getattr(self, "_compiled", None) is None:
+            self._compiled = {}
+        params, compiled = self._compiled.get(key, (None, None))
+        if params is not lgdistribution:
+            compiled = self._compile(lgdistribution)
+            self._compiled[key] = (lgdistribution, compiled)
+        return compiled
+
+    @staticmethod
+    def _compile(lgdistribution: CondMixtureGaussParams) -> CompiledMixture:
+        return compile_mixture(
+            lgdistribution["mean"], lgdistribution["covars"], lgdistribution["coef"]
+        )
+
+    @staticmethod
+    def _split_pvals(pvals):
         lgpvals = []
         dispvals = []
 
@@ -121,33 +109,29 @@ class ConditionalMixtureGaussianNode(BaseNode):
                 dispvals.append(pval)
             else:
                 lgpvals.append(pval)
+        return str(dispvals), lgpvals
 
-        lgdistribution = node_info["hybcprob"][str(dispvals)]
-        mean = lgdistribution["mean"]
-        covariance = lgdistribution["covars"]
-        w = lgdistribution["coef"]
+    @staticmethod
+    def get_dist(node_info, pvals, compiled: Optional[CompiledMixture] = None):
+        """
+        compiled: params of the combination of discrete pvals compiled by
+        compiled_mixture (cached by node), they are built if not passed
+        """
+        key, lgpvals = ConditionalMixtureGaussianNode._split_pvals(pvals)
+        lgdistribution = node_info["hybcprob"][key]
 
-        if len(w) != 0:
+        if len(lgdistribution["coef"]) != 0:
+            mixture = compiled
+            if mixture is None:
+                mixture = ConditionalMixtureGaussianNode._compile(lgdistribution)
             if len(lgpvals) != 0:
-                indexes = [i for i in range(1, (len(lgpvals) + 1), 1)]
                 if not np.isnan(np.array(lgpvals)).all():
-                    n_comp = len(w)
-                    gmm = GMM(
-                        n_components=n_comp,
-                        priors=w,
-                        means=mean,
-                        covariances=covariance,
-                    )
-                    cond_gmm = gmm.condition(indexes, [lgpvals])
-                    return cond_gmm.means, cond_gmm.covariances, cond_gmm.priors
+                    priors, means, variances = mixture.condition([lgpvals])
+                    return means[0][:, None], variances[:, None, None], priors[0]
                 else:
                     return np.nan, np.nan, np.nan
             else:
-                n_comp = len(w)
-                gmm = GMM(
-                    n_components=n_comp, priors=w, means=mean, covariances=covariance
-                )
-                return gmm.means, gmm.covariances, gmm.priors
+                return mixture.means, mixture.covariances, mixture.priors
         else:
             return np.nan, np.nan, np.nan
 
@@ -162,66 +146,89 @@ class ConditionalMixtureGaussianNode(BaseNode):
         node_info: nodes info from distributions
         pvals: parent values
         """
-        mean, covariance, w = self.get_dist(node_info, pvals)
+        key, lgpvals = self._split_pvals(pvals)
+        lgdistribution = node_info["hybcprob"][key]
 
-        # check if w is nan or list of weights
-        if not isinstance(w,  np.ndarray):
+        if len(lgdistribution["coef"]) == 0:
             return np.nan
-            
-        n_comp = len(w)
-        
-        gmm = GMM(
-            n_components=n_comp,
-            priors=w,
-            means=mean,
-            covariances=covariance,
-        )
-        sample = gmm.sample(1)[0][0]
-        return sample
+        mixture = self.compiled_mixture(key, lgdistribution)
+        if len(lgpvals) == 0:
+            return mixture.sample()[0]
+        if np.isnan(np.array(lgpvals)).all():
+            return np.nan
+        return mixture.sample([lgpvals])[0]
+
+    def choose_batch(
+        self,
+        node_info: Dict[str, Dict[str, CondMixtureGaussParams]],
+        pvals: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Function to get n values from ConditionalMixtureGaussian node,
+        one vectorized pass for every combination of discrete parents
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values in cont_parents + disc_parents order
+        """
+        output = np.full(pvals.shape[0], np.nan)
+        for rows, mixture, x in self._batch_dist(node_info, pvals):
+            output[rows] = mixture.sample(x, size=len(rows))
+        return output
+
+    def predict_batch(
+        self,
+        node_info: Dict[str, Dict[str, CondMixtureGaussParams]],
+        pvals: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Function to get n predictions from ConditionalMixtureGaussian node,
+        one vectorized pass for every combination of discrete parents
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values in cont_parents + disc_parents order
+        """
+        output = np.full(pvals.shape[0], np.nan)
+        for rows, mixture, x in self._batch_dist(node_info, pvals):
+            output[rows] = mixture.expectation(x)
+        return output
+
+    def _batch_dist(self, node_info, pvals: np.ndarray):
+        n_cont = len(self.cont_parents)
+        for comb, rows in self._group_rows(pvals[:, n_cont:]):
+            key = str(comb)
+            lgdistribution = node_info["hybcprob"][key]
+            if len(lgdistribution["coef"]) == 0:
+                continue
+            x = pvals[rows, :n_cont].astype(float) if n_cont else None
+            yield rows, self.compiled_mixture(key, lgdistribution), x
 
     @staticmethod
     def predict(
         node_info: Dict[str, Dict[str, CondMixtureGaussParams]],
         pvals: List[Union[str, float]],
+        compiled: Optional[CompiledMixture] = None,
     ) -> Optional[float]:
         """
         Function to get prediction from ConditionalMixtureGaussian node
         params:
         node_info: nodes info from distributions
         pvals: parent values
+        compiled: params of the combination of discrete pvals compiled by
+        compiled_mixture (cached by node), they are built if not passed
         """
-
-        dispvals = []
-        lgpvals = []
-        for pval in pvals:
-            if (isinstance(pval, str)) | (isinstance(pval, int)):
-                dispvals.append(pval)
-            else:
-                lgpvals.append(pval)
-        lgdistribution = node_info["hybcprob"][str(dispvals)]
-        mean = lgdistribution["mean"]
-        covariance = lgdistribution["covars"]
-        w = lgdistribution["coef"]
-        if len(w) != 0:
+        key, lgpvals = ConditionalMixtureGaussianNode._split_pvals(pvals)
+        lgdistribution = node_info["hybcprob"][key]
+        if len(lgdistribution["coef"]) != 0:
+            mixture = compiled
+            if mixture is None:
+                mixture = ConditionalMixtureGaussianNode._compile(lgdistribution)
             if len(lgpvals) != 0:
-                indexes = [i for i in range(1, (len(lgpvals) + 1), 1)]
                 if not np.isnan(np.array(lgpvals)).all():
-                    n_comp = len(w)
-                    gmm = GMM(
-                        n_components=n_comp,
-                        priors=w,
-                        means=mean,
-                        covariances=covariance,
-                    )
-                    sample = gmm.predict(indexes, [lgpvals])[0][0]
+                    sample = mixture.expectation([lgpvals])[0]
                 else:
                     sample = np.nan
             else:
-                # n_comp = len(w)
-                # gmm = GMM(n_components=n_comp, priors=w, means=mean, covariances=covariance)
-                sample = 0
-                for ind, wi in enumerate(w):
-                    sample += wi * mean[ind][0]
+                sample = mixture.expectation()
         else:
             sample = np.nan
         return sample
@@ -1,22 +1,91 @@
 import random
+from ast import literal_eval
 from itertools import product
-from typing import Type, Dict, Union, List
+from typing import Type, Dict, Union, List, NamedTuple, Optional
 
 import numpy as np
-from pandas import DataFrame, crosstab
+from pandas import DataFrame, Index, crosstab
 
 from .base import BaseNode
 from .schema import DiscreteParams
 
 
+class CompiledCPT(NamedTuple):
+    """
+    Integer-indexed form of cprob.
+    parents_categories: one Index per parent mapping category to its code
+    shape: number of categories of every parent
+    table: array (product of shape, number of vals) of distributions
+    known: mask of combinations present in cprob
+    default: distribution of unobserved combinations (sparse cprob only)
+    rows: sorted flat codes of combinations stored in table (sparse cprob only),
+    then table has one row per observed combination instead of the full product
+    """
+
+    parents_categories: List[Index]
+    shape: tuple
+    table: np.ndarray
+    known: np.ndarray
+    default: Optional[np.ndarray] = None
+    rows: Optional[np.ndarray] = None
+
+    def gather(self, pvals: np.ndarray) -> np.ndarray:
+        """
+        Return distribution for every row of parent values.
+        pvals: array (n, number of parents) with parent values
+        """
+        if not self.parents_categories:
+            return np.broadcast_to(self.table[0], (pvals.shape[0], self.table.shape[1]))
+        codes = [
+            categories.get_indexer(column.astype(str))
+            for categories, column in zip(self.parents_categories, pvals.T)
+        ]
+        flat = np.ravel_multi_index(codes, self.shape, mode="clip")
+        missing = np.any(np.array(codes) < 0, axis=0)
+        if self.rows is not None:
+            combinations = flat
+            flat = np.minimum(np.searchsorted(self.rows, flat), len(self.rows) - 1)
+            missing |= self.rows[flat] != combinations
+        else:
+            missing |= ~self.known[flat]
+        if not missing.any():
+            return self.table[flat]
+        if self.default is None:
+            raise KeyError(str([str(i) for i in pvals[missing.argmax()]]))
+        dists = self.table[flat]
+        dists[missing] = self.default
+        return dists
+
+    def dense(self):
+        """
+        Return table over the full product of parents categories and mask of known combinations.
+        """
+        if self.rows is None:
+            return self.table, self.known
+        table = np.empty((int(np.prod(self.shape)), self.table.shape[1]))
+        table[:] = self.default
+        table[self.rows] = self.table
+        known = np.zeros(len(table), dtype=bool)
+        known[self.rows] = True
+        return table, known
+
+
 class DiscreteNode(BaseNode):
     """
     Main class of Discrete Node
     """
 
-    def __init__(self, name):
+    __slots__ = ("sparse", "_compiled")
+
+    def __init__(self, name, sparse: bool = False):
+        """
+        :param sparse: store in cprob only observed combinations of parents,
+        the others share default distribution
+        """
         super(DiscreteNode, self).__init__(name)
         self.type = "Discrete"
+        self.sparse = sparse
+        self._compiled = (None, None)
 
     def fit_parameters(self, data: DataFrame, num_workers: int = 1):
         """
@@ -24,7 +93,9 @@ class DiscreteNode(BaseNode):
         data: DataFrame to train on
         num_workers: number of Parallel Workers
         Method returns probas dict with the following format {[<combinations>: value]}
-        and vals, list of appeared values in combinations
+        and vals, list of appeared values in combinations.
+        Sparse node stores only observed combinations and adds "default" distribution
+        (uniform) used for the others.
         """
 
         def worker(node: Type[BaseNode]) -> DiscreteParams:
@@ -32,13 +103,17 @@ class DiscreteNode(BaseNode):
             dist = data[node.name].value_counts(normalize=True).sort_index()
             vals = [str(i) for i in dist.index.to_list()]
 
+            default = [1 / len(vals) for _ in vals]
             if not parents:
                 cprob = dist.to_list()
             else:
-                cprob = {
-                    str([str(i) for i in comb]): [1 / len(vals) for _ in vals]
-                    for comb in product(*[data[p].unique() for p in parents])
-                }
+                if node.sparse:
+                    cprob = {}
+                else:
+                    cprob = {
+                        str([str(i) for i in comb]): list(default)
+                        for comb in product(*[data[p].unique() for p in parents])
+                    }
 
                 conditional_dist = crosstab(
                     data[node.name].to_list(),
@@ -52,6 +127,8 @@ class DiscreteNode(BaseNode):
                         cprob[str([str(i) for i in comb])] = probs
                     else:
                         cprob[f"['{comb}']"] = probs
+            if parents and node.sparse:
+                return {"cprob": cprob, "vals": vals, "default": default}
             return {"cprob": cprob, "vals": vals}
 
         # pool = ThreadPoolExecutor(num_workers)
@@ -59,13 +136,130 @@ class DiscreteNode(BaseNode):
         result = worker(self)
         return result
 
+    def statistics(self, data: DataFrame) -> dict:
+        """
+        Counts of node values for every observed combination of parents
+        and values of every parent.
+        """
+        parents = self.disc_parents + self.cont_parents
+        if not parents:
+            counts = data[self.name].value_counts()
+            counts = {"[]": {str(val): int(count) for val, count in counts.items()}}
+        else:
+            counts = {}
+            grouped = data.groupby(parents, sort=False)[self.name].value_counts()
+            for index, count in grouped.items():
+                key = str([str(i) for i in index[:-1]])
+                counts.setdefault(key, {})[str(index[-1])] = int(count)
+        parents_values = [[str(i) for i in data[p].unique()] for p in parents]
+        return {"counts": counts, "parents_values": parents_values}
+
+    @staticmethod
+    def merge_statistics(statistics: dict, other: dict) -> dict:
+        counts = {key: dict(dist) for key, dist in statistics["counts"].items()}
+        for key, dist in other["counts"].items():
+            merged = counts.setdefault(key, {})
+            for val, count in dist.items():
+                merged[val] = merged.get(val, 0) + count
+        parents_values = [
+            list(dict.fromkeys(values + other_values))
+            for values, other_values in zip(
+                statistics["parents_values"], other["parents_values"]
+            )
+        ]
+        return {"counts": counts, "parents_values": parents_values}
+
+    def from_statistics(self, statistics: dict) -> DiscreteParams:
+        counts = statistics["counts"]
+        vals = sorted({val for dist in counts.values() for val in dist})
+
+        def normalize(dist):
+            total = sum(dist.values())
+            return [dist.get(val, 0) / total for val in vals]
+
+        if not statistics["parents_values"]:
+            return {"cprob": normalize(counts["[]"]), "vals": vals}
+
+        default = [1 / len(vals) for _ in vals]
+        if self.sparse:
+            cprob = {}
+        else:
+            cprob = {
+                str(list(comb)): list(default)
+                for comb in product(*statistics["parents_values"])
+            }
+        for key, dist in counts.items():
+            cprob[key] = normalize(dist)
+        if self.sparse:
+            return {"cprob": cprob, "vals": vals, "default": default}
+        return {"cprob": cprob, "vals": vals}
+
     @staticmethod
     def get_dist(node_info, pvals):
         if not pvals:
             return node_info["cprob"]
-        else:
-            # noinspection PyTypeChecker
-            return node_info["cprob"][str(pvals)]
+        key = str(pvals)
+        if "default" in node_info and key not in node_info["cprob"]:
+            return node_info["default"]
+        # noinspection PyTypeChecker
+        return node_info["cprob"][key]
+
+    @staticmethod
+    def compile_cprob(node_info: Dict[str, Union[float, str]]) -> CompiledCPT:
+        """
+        Build integer-indexed array from cprob dict, so lookups become a gather instead of
+        key formatting and hashing. The dict itself stays the serializable form.
+        params:
+        node_info: nodes info from distributions
+        """
+        cprob = node_info["cprob"]
+        if not isinstance(cprob, dict):
+            table = np.array([cprob], dtype=float)
+            return CompiledCPT([], (), table, np.ones(1, dtype=bool))
+
+        default = node_info.get("default")
+        if default is not None:
+            default = np.array(default, dtype=float)
+            if not cprob:
+                # nothing observed: every combination gets default
+                table = np.array([default])
+                return CompiledCPT([], (), table, np.ones(1, dtype=bool), default)
+
+        combinations = [literal_eval(key) for key in cprob.keys()]
+        parents_categories = [
+            Index(list(dict.fromkeys(column))) for column in zip(*combinations)
+        ]
+        shape = tuple(len(categories) for categories in parents_categories)
+        codes = [
+            categories.get_indexer(column)
+            for categories, column in zip(parents_categories, zip(*combinations))
+        ]
+        flat = np.ravel_multi_index(codes, shape)
+        values = np.array(list(cprob.values()), dtype=float)
+
+        if default is not None:
+            # sparse cprob: keep only observed rows, sorted for binary search
+            order = np.argsort(flat)
+            known = np.ones(len(flat), dtype=bool)
+            return CompiledCPT(
+                parents_categories, shape, values[order], known, default, flat[order]
+            )
+
+        table = np.full((np.prod(shape), len(node_info["vals"])), np.nan)
+        table[flat] = values
+        known = np.zeros(len(table), dtype=bool)
+        known[flat] = True
+        return CompiledCPT(parents_categories, shape, table, known)
+
+    def compiled_cprob(self, node_info: Dict[str, Union[float, str]]) -> CompiledCPT:
+        """
+        Return compiled cprob of node, it is rebuilt only when cprob object is replaced.
+        """
+        cprob, compiled = getattr(self, "_compiled", (None, None))
+        if cprob is not node_info["cprob"]:
+            compiled = self.compile_cprob(node_info)
+            self._compiled = (node_info["cprob"], compiled)
+        return compiled
 
     def choose(self, node_info: Dict[str, Union[float, str]], pvals: List[str]) -> str:
         """
@@ -84,6 +278,19 @@ class DiscreteNode(BaseNode):
 
         return vals[rindex]
 
+    def choose_batch(
+        self, node_info: Dict[str, Union[float, str]], pvals: np.ndarray
+    ) -> np.ndarray:
+        """
+        Return n values from discrete node in one pass over compiled cprob.
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values
+        """
+        vals = np.array(node_info["vals"], dtype=object)
+        dists = self.compiled_cprob(node_info).gather(pvals)
+        return vals[self.sample_indices(dists)]
+
     @staticmethod
     def predict(node_info: Dict[str, Union[float, str]], pvals: List[str]) -> str:
         """function for prediction based on evidence values in discrete node
@@ -97,12 +304,7 @@ class DiscreteNode(BaseNode):
         """
 
         vals = node_info["vals"]
-        disct = []
-        if not pvals:
-            dist = node_info["cprob"]
-        else:
-            # noinspection PyTypeChecker
-            dist = node_info["cprob"][str(pvals)]
+        dist = DiscreteNode.get_dist(node_info, pvals)
         max_value = max(dist)
         indices = [index for index, value in enumerate(dist) if value == max_value]
         max_ind = 0
@@ -111,3 +313,18 @@ class DiscreteNode(BaseNode):
         else:
             max_ind = random.choice(indices)
         return vals[max_ind]
+
+    def predict_batch(
+        self, node_info: Dict[str, Union[float, str]], pvals: np.ndarray
+    ) -> np.ndarray:
+        """
+        Return n predictions from discrete node in one pass.
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values
+        """
+        vals = np.array(node_info["vals"], dtype=object)
+        dists = self.compiled_cprob(node_info).gather(pvals)
+        # ties are broken randomly for every row as in predict
+        ties = dists == dists.max(axis=1, keepdims=True)
+        return vals[np.argmax(ties * np.random.random(dists.shape), axis=1)]
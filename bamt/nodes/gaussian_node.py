@@ -5,6 +5,7 @@ from typing import Optional, List
 import numpy as np
 from pandas import DataFrame
 from sklearn import linear_model
+from sklearn.base import clone
 from sklearn.metrics import mean_squared_error as mse
 
 from .base import BaseNode
@@ -16,6 +17,8 @@ class GaussianNode(BaseNode):
     Main class for Gaussian Node
     """
 
+    __slots__ = ("regressor",)
+
     def __init__(self, name, regressor: Optional[object] = None):
         super(GaussianNode, self).__init__(name)
         if regressor is None:
@@ -49,6 +52,62 @@ class GaussianNode(BaseNode):
                 "serialization": None,
             }
 
+    def statistics(self, data: DataFrame) -> Optional[dict]:
+        """
+        Count, means and comoment matrix of [parents..., node] columns:
+        running mean/variance for root node and (centered) normal equations
+        for linear regression. Other regressors can't be updated incrementally.
+        """
+        parents = self.cont_parents
+        if type(self).__name__ == "CompositeContinuousNode":
+            parents = parents + self.disc_parents
+        if parents:
+            if type(self.regressor) is not linear_model.LinearRegression:
+                return None
+            if not self.regressor.fit_intercept or self.regressor.positive:
+                return None
+        values = data[parents + [self.name]].values.astype(float)
+        mean = values.mean(axis=0)
+        centered = values - mean
+        return {"n": len(values), "mean": mean, "comoment": centered.T @ centered}
+
+    @staticmethod
+    def merge_statistics(statistics: dict, other: dict) -> dict:
+        n = statistics["n"] + other["n"]
+        delta = other["mean"] - statistics["mean"]
+        return {
+            "n": n,
+            "mean": statistics["mean"] + delta * other["n"] / n,
+            "comoment": statistics["comoment"]
+            + other["comoment"]
+            + np.outer(delta, delta) * statistics["n"] * other["n"] / n,
+        }
+
+    def from_statistics(self, statistics: dict) -> GaussianParams:
+        n, mean, comoment = statistics["n"], statistics["mean"], statistics["comoment"]
+        if len(mean) == 1:
+            return {
+                "mean": mean[0],
+                "regressor_obj": None,
+                "regressor": None,
+                "variance": comoment[0, 0] / n,
+                "serialization": None,
+            }
+
+        coef = np.linalg.lstsq(comoment[:-1, :-1], comoment[:-1, -1], rcond=None)[0]
+        model = clone(self.regressor)
+        model.coef_ = coef
+        model.intercept_ = mean[-1] - mean[:-1] @ coef
+        model.n_features_in_ = len(coef)
+        residuals = max(comoment[-1, -1] - coef @ comoment[:-1, -1], 0)
+        return {
+            "mean": np.nan,
+            "regressor_obj": model,
+            "regressor": type(self.regressor).__name__,
+            "variance": math.sqrt(residuals / n),
+            "serialization": None,
+        }
+
     def get_dist(self, node_info, pvals):
         var = node_info["variance"]
         if pvals:
@@ -76,6 +135,23 @@ class GaussianNode(BaseNode):
         cond_mean, var = self.get_dist(node_info, pvals)
         return random.gauss(cond_mean, var)
 
+    def choose_batch(self, node_info: GaussianParams, pvals: np.ndarray) -> np.ndarray:
+        """
+        Return n values from Gaussian node with a single regressor call
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values
+        """
+        n = pvals.shape[0]
+        if pvals.shape[1]:
+            model = node_info["regressor_obj"]
+            cond_mean = model.predict(np.asarray(pvals, dtype=float))
+            return np.random.normal(cond_mean, node_info["variance"], n)
+        else:
+            return np.random.normal(
+                node_info["mean"], math.sqrt(node_info["variance"]), n
+            )
+
     @staticmethod
     def predict(node_info: GaussianParams, pvals: List[float]) -> float:
         """
@@ -94,3 +170,16 @@ class GaussianNode(BaseNode):
             return pred
         else:
             return node_info["mean"]
+
+    def predict_batch(self, node_info: GaussianParams, pvals: np.ndarray) -> np.ndarray:
+        """
+        Return n predictions from Gaussian node with a single regressor call
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values
+        """
+        if pvals.shape[1]:
+            model = node_info["regressor_obj"]
+            return model.predict(np.asarray(pvals, dtype=float))
+        else:
+            return np.full(pvals.shape[0], node_info["mean"], dtype=float)
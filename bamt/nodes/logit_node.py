@@ -14,6 +14,8 @@ class LogitNode(BaseNode):
     Main class for logit node
     """
 
+    __slots__ = ("classifier",)
+
     def __init__(self, name, classifier: Optional[object] = None):
         super(LogitNode, self).__init__(name)
         if classifier is None:
@@ -72,6 +74,36 @@ class LogitNode(BaseNode):
         else:
             return str(node_info["classes"][0])
 
+    def choose_batch(self, node_info: LogitParams, pvals: np.ndarray) -> np.ndarray:
+        """
+        Return n values from Logit node with a single classifier call
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values
+        """
+        classes = np.array([str(c) for c in node_info["classes"]], dtype=object)
+        if len(classes) > 1:
+            model = node_info["classifier_obj"]
+            distribution = model.predict_proba(np.asarray(pvals, dtype=float))
+            return classes[self.sample_indices(distribution)]
+        else:
+            return np.full(pvals.shape[0], classes[0], dtype=object)
+
+    @staticmethod
+    def predict_batch(node_info: LogitParams, pvals: np.ndarray) -> np.ndarray:
+        """
+        Return n predictions from Logit node with a single classifier call
+        params:
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values
+        """
+        if len(node_info["classes"]) > 1:
+            model = node_info["classifier_obj"]
+            pred = model.predict(np.asarray(pvals, dtype=float))
+            return np.array([str(p) for p in np.ravel(pred)], dtype=object)
+        else:
+            return np.full(pvals.shape[0], str(node_info["classes"][0]), dtype=object)
+
     @staticmethod
     def predict(node_info: LogitParams, pvals: List[Union[float]]) -> str:
         """
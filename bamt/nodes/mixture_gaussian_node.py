@@ -1,10 +1,9 @@
 from typing import Union, List, Optional
 
 import numpy as np
-from gmr import GMM
 from pandas import DataFrame
 
-from bamt.utils.MathUtils import component
+from bamt.utils.MathUtils import CompiledMixture, compile_mixture, fit_mixture
 from .base import BaseNode
 from .schema import MixtureGaussianParams
 
@@ -14,8 +13,19 @@ class MixtureGaussianNode(BaseNode):
     Main class for Mixture Gaussian Node
     """
 
-    def __init__(self, name):
+    __slots__ = ("n_jobs", "patience", "_compiled")
+
+    def __init__(
+        self, name, n_jobs: Optional[int] = None, patience: Optional[int] = None
+    ):
+        """
+        :param n_jobs: number of threads fitting candidate numbers of components
+        :param patience: stop the search of number of components after this many
+        candidates without improvement of AIC and BIC (None - try all candidates)
+        """
         super(MixtureGaussianNode, self).__init__(name)
+        self.n_jobs = n_jobs
+        self.patience = patience
         self.type = "MixtureGaussian"
 
     def fit_parameters(self, data: DataFrame) -> MixtureGaussianParams:
@@ -24,18 +34,13 @@ class MixtureGaussianNode(BaseNode):
         """
         parents = self.disc_parents + self.cont_parents
         if not parents:
-            n_comp = int(
-                (
-                    component(data, [self.name], "aic")
-                    + component(data, [self.name], "bic")
-                )
-                / 2
-            )  # component(data, [node], 'LRTS')#
+            # component(data, [node], 'LRTS')#
             # n_comp = 3
-            gmm = GMM(n_components=n_comp).from_samples(
+            gmm = fit_mixture(
                 np.transpose([data[self.name].values]),
                 n_iter=500,
-                init_params="kmeans++",
+                n_jobs=self.n_jobs,
+                patience=self.patience,
             )
             means = gmm.means.tolist()
             cov = gmm.covariances.tolist()
@@ -49,16 +54,13 @@ class MixtureGaussianNode(BaseNode):
                 nodes = [self.name] + self.cont_parents
                 new_data = data[nodes]
                 new_data.reset_index(inplace=True, drop=True)
-                n_comp = int(
-                    (
-                        component(new_data, nodes, "aic")
-                        + component(new_data, nodes, "bic")
-                    )
-                    / 2
-                )  # component(new_data, nodes, 'LRTS')#
+                # component(new_data, nodes, 'LRTS')#
                 # n_comp = 3
-                gmm = GMM(n_components=n_comp).from_samples(
-                    new_data[nodes].values, n_iter=500, init_params="kmeans++"
+                gmm = fit_mixture(
+                    new_data[nodes].values,
+                    n_iter=500,
+                    n_jobs=self.n_jobs,
+                    patience=self.patience,
                 )
                 means = gmm.means.tolist()
                 cov = gmm.covariances.tolist()
@@ -68,31 +70,42 @@ class MixtureGaussianNode(BaseNode):
                 #     w.append(np.mean(row))
                 return {"mean": means, "coef": w, "covars": cov}
 
+    def compiled_mixture(self, node_info: MixtureGaussianParams) -> CompiledMixture:
+        """
+        Return mixture params as arrays with precomputed conditioning terms,
+        it is rebuilt only when params of node are replaced.
+        """
+        params, compiled = getattr(self, "_compiled", (None, None))
+        if params is not node_info:
+            compiled = self._compile(node_info)
+            self._compiled = (node_info, compiled)
+        return compiled
+
     @staticmethod
-    def get_dist(node_info, pvals):
-        mean = node_info["mean"]
-        covariance = node_info["covars"]
-        w = node_info["coef"]
+    def _compile(node_info: MixtureGaussianParams) -> CompiledMixture:
+        return compile_mixture(
+            node_info["mean"], node_info["covars"], node_info["coef"]
+        )
+
+    @staticmethod
+    def get_dist(node_info, pvals, compiled: Optional[CompiledMixture] = None):
+        """
+        compiled: node_info compiled by compiled_mixture (cached by node),
+        it is built from node_info if not passed
+        """
         n_comp = len(node_info["coef"])
         if n_comp != 0:
+            mixture = compiled
+            if mixture is None:
+                mixture = MixtureGaussianNode._compile(node_info)
             if pvals:
-                indexes = [i for i in range(1, len(pvals) + 1)]
                 if not np.isnan(np.array(pvals)).all():
-                    gmm = GMM(
-                        n_components=n_comp,
-                        priors=w,
-                        means=mean,
-                        covariances=covariance,
-                    )
-                    cond_gmm = gmm.condition(indexes, [pvals])
-                    return cond_gmm.means, cond_gmm.covariances, cond_gmm.priors
+                    priors, means, variances = mixture.condition([pvals])
+                    return means[0][:, None], variances[:, None, None], priors[0]
                 else:
                     return np.nan, np.nan, np.nan
             else:
-                gmm = GMM(
-                    n_components=n_comp, priors=w, means=mean, covariances=covariance
-                )
-                return gmm.means, gmm.covariances, gmm.priors
+                return mixture.means, mixture.covariances, mixture.priors
         else:
             return np.nan, np.nan, np.nan
 
@@ -105,50 +118,72 @@ class MixtureGaussianNode(BaseNode):
         pvals: parent values
         Return value from MixtureGaussian node
         """
-        mean, covariance, w = self.get_dist(node_info, pvals)
+        if len(node_info["coef"]) == 0:
+            return np.nan
+        mixture = self.compiled_mixture(node_info)
+        if not pvals:
+            return mixture.sample()[0]
+        if np.isnan(np.array(pvals)).all():
+            return np.nan
+        return mixture.sample([pvals])[0]
 
-        n_comp = len(w)
+    def choose_batch(
+        self, node_info: MixtureGaussianParams, pvals: np.ndarray
+    ) -> np.ndarray:
+        """
+        Func to get n values from current node in one vectorized pass
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values
+        """
+        if len(node_info["coef"]) == 0:
+            return np.full(pvals.shape[0], np.nan)
+        return self.compiled_mixture(node_info).sample(pvals)
 
-        gmm = GMM(
-            n_components=n_comp,
-            priors=w,
-            means=mean,
-            covariances=covariance,
-        )
-        return gmm.sample(1)[0][0]
+    @staticmethod
+    def predict_batch(
+        node_info: MixtureGaussianParams,
+        pvals: np.ndarray,
+        compiled: Optional[CompiledMixture] = None,
+    ) -> np.ndarray:
+        """
+        Func to get n predictions from current node in one vectorized pass
+        node_info: nodes info from distributions
+        pvals: array (n, number of parents) with parent values
+        compiled: node_info compiled by compiled_mixture
+        """
+        if len(node_info["coef"]) == 0:
+            return np.full(pvals.shape[0], np.nan)
+        mixture = compiled
+        if mixture is None:
+            mixture = MixtureGaussianNode._compile(node_info)
+        return mixture.expectation(pvals)
 
     @staticmethod
     def predict(
-        node_info: MixtureGaussianParams, pvals: List[Union[str, float]]
+        node_info: MixtureGaussianParams,
+        pvals: List[Union[str, float]],
+        compiled: Optional[CompiledMixture] = None,
     ) -> Optional[float]:
         """
         Func to get prediction from current node
         node_info: nodes info from distributions
         pvals: parent values
+        compiled: node_info compiled by compiled_mixture (cached by node),
+        it is built from node_info if not passed
         Return value from MixtureGaussian node
         """
-        mean = node_info["mean"]
-        covariance = node_info["covars"]
-        w = node_info["coef"]
         n_comp = len(node_info["coef"])
         if n_comp != 0:
+            mixture = compiled
+            if mixture is None:
+                mixture = MixtureGaussianNode._compile(node_info)
             if pvals:
-                indexes = [i for i in range(1, len(pvals) + 1)]
                 if not np.isnan(np.array(pvals)).all():
-                    gmm = GMM(
-                        n_components=n_comp,
-                        priors=w,
-                        means=mean,
-                        covariances=covariance,
-                    )
-                    sample = gmm.predict(indexes, [pvals])[0][0]
+                    sample = mixture.expectation([pvals])[0]
                 else:
                     sample = np.nan
             else:
-                # gmm = GMM(n_components=n_comp, priors=w, means=mean, covariances=covariance)
-                sample = 0
-                for ind, wi in enumerate(w):
-                    sample += wi * mean[ind][0]
+                sample = mixture.expectation()
         else:
             sample = np.nan
         return sample
@@ -26,11 +26,30 @@ Strategies to improve Greedy Hill-Climbing:
     of these steps.
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappush, heappop
+
+from joblib import effective_n_jobs
+
 from bamt.external.pyBN.classes.bayesnet import BayesNet
 from bamt.external.pyBN.utils.graph import would_cause_cycle
 from bamt.mi_entropy_gauss import mi_gauss
 from bamt.redef_info_scores import log_lik_local, BIC_local, AIC_local
 
+# data and score function of pool worker, set once by _init_worker
+_worker_data = None
+_worker_score = None
+
+
+def _init_worker(data, score):
+    global _worker_data, _worker_score
+    _worker_data = data
+    _worker_score = score
+
+
+def _score_family(cols):
+    return _worker_score(_worker_data[:, cols])
+
 
 def hc(
     data,
@@ -42,6 +61,11 @@ def hc(
     init_edges=None,
     remove_geo_edges=True,
     black_list=None,
+    n_jobs=1,
+    score_cache=None,
+    max_parents=3,
+    candidate_parents=None,
+    fixed_edges=None,
 ):
     """
     Greedy Hill Climbing search proceeds by choosing the move
@@ -55,7 +79,7 @@ def hc(
     look ahead to what may be better later on in the search.
 
     For computational saving, a Priority Queue (python's heapq)
-    can be used	to maintain the best operators and reduce the
+    is used to maintain the best operators and reduce the
     complexity of picking the best operator from O(n^2) to O(nlogn).
     This works by maintaining the heapq of operators sorted by their
     delta score, and each time a move is made, we only have to recompute
@@ -100,6 +124,29 @@ def hc(
     *restriction* : a list of 2-tuples
         For MMHC algorithm, the list of allowable edge additions.
 
+    *fixed_edges* : a list of 2-tuples
+        Edges added to the initial network which are never removed or
+        reversed, whatever remove_geo_edges is.
+
+    *max_parents* : an integer
+        The maximum number of parents of a node.
+
+    *candidate_parents* : a dict {node: iterable of nodes}
+        Allowable parents of every node (e.g. from MMPC screening or
+        BigBraveBN), nodes absent in dict can't get parents. Only candidates
+        are scored, so sparse candidate sets make every iteration O(n * k)
+        instead of O(n^2). It is intersected with restriction.
+
+    *n_jobs* : an integer
+        Number of processes which score uncached families.
+        Data is sent to every process once, when the pool starts.
+        Negative values count from the number of CPUs as in joblib
+        (-1 means all CPUs), 0 is an error.
+
+    *score_cache* : a ScoreCache object
+        Family scores kept between calls, keyed by column names
+        and fingerprint of data.
+
     Returns
     -------
     *bn* : a BayesNet object
@@ -114,8 +161,9 @@ def hc(
     # maintain children and parents dict for fast lookups
     c_dict = dict([(n, []) for n in names])
     p_dict = dict([(n, []) for n in names])
-    if init_edges:
-        for edge in init_edges:
+    fixed_edges = [tuple(edge) for edge in fixed_edges or ()]
+    if init_edges or fixed_edges:
+        for edge in dict.fromkeys([tuple(e) for e in init_edges or ()] + fixed_edges):
             c_dict[edge[0]].append(edge[1])
             p_dict[edge[1]].append(edge[0])
 
@@ -129,187 +177,211 @@ def hc(
     if metric == "LL":
         mutual_information = log_lik_local
 
+    if score_cache is None:
+        cache = dict()
+    else:
+        cache = score_cache.family_view(
+            metric, data.columns, score_cache.fingerprint(data)
+        )
+
     data = data.values
 
-    cache = dict()
-
-    _iter = 0
-    improvement = True
-
-    while improvement:
-        improvement = False
-        max_delta = 0
-
-        if debug:
-            print("ITERATION: ", _iter)
-
-        ### TEST ARC ADDITIONS ###
-        for u in bn.nodes():
-            for v in bn.nodes():
-                if (
-                    v not in c_dict[u]
-                    and u != v
-                    and not would_cause_cycle(c_dict, u, v)
-                    and len(p_dict[v]) != 3
-                ):
-                    # FOR MMHC ALGORITHM -> Edge Restrictions
-                    if (
-                        (init_nodes is None or not (v in init_nodes))
-                        and (restriction is None or (u, v) in restriction)
-                        and (black_list is None or not ((u, v) in black_list))
-                    ):
-                        # SCORE FOR 'V' -> gaining a parent
-                        # without 'u' as parent
-                        old_cols = (v,) + tuple(p_dict[v])
-                        if old_cols not in cache:
-                            cache[old_cols] = mutual_information(data[:, old_cols])
-                        mi_old = cache[old_cols]
-                        new_cols = old_cols + (u,)  # with'u' as parent
-                        if new_cols not in cache:
-                            cache[new_cols] = mutual_information(data[:, new_cols])
-                        mi_new = cache[new_cols]
-                        delta_score = nrow * (mi_old - mi_new)
-
-                        if delta_score > max_delta:
-                            if debug:
-                                print("Improved Arc Addition: ", (u, v))
-                                print("Delta Score: ", delta_score)
-                            max_delta = delta_score
-                            max_operation = "Addition"
-                            max_arc = (u, v)
-
-        # ### TEST ARC DELETIONS ###
-        for u in bn.nodes():
-            for v in bn.nodes():
-                if v in c_dict[u]:
-                    # SCORE FOR 'V' -> losing a parent
-                    old_cols = (v,) + tuple(p_dict[v])  # with 'u' as parent
-                    if old_cols not in cache:
-                        cache[old_cols] = mutual_information(data[:, old_cols])
-                    mi_old = cache[old_cols]
-                    new_cols = tuple([i for i in old_cols if i != u])
-                    if new_cols not in cache:
-                        cache[new_cols] = mutual_information(data[:, new_cols])
-                    mi_new = cache[new_cols]
-                    delta_score = nrow * (mi_old - mi_new)
-
-                    if delta_score > max_delta:
-                        if init_edges is None:
-                            if debug:
-                                print("Improved Arc Deletion: ", (u, v))
-                                print("Delta Score: ", delta_score)
-                            max_delta = delta_score
-                            max_operation = "Deletion"
-                            max_arc = (u, v)
-                        else:
-                            if (u, v) in init_edges:
-                                if remove_geo_edges:
-                                    if debug:
-                                        print("Improved Arc Deletion: ", (u, v))
-                                        print("Delta Score: ", delta_score)
-                                    max_delta = delta_score
-                                    max_operation = "Deletion"
-                                    max_arc = (u, v)
-                            else:
-                                if debug:
-                                    print("Improved Arc Deletion: ", (u, v))
-                                    print("Delta Score: ", delta_score)
-                                max_delta = delta_score
-                                max_operation = "Deletion"
-                                max_arc = (u, v)
-
-        # ### TEST ARC REVERSALS ###
-        for u in bn.nodes():
-            for v in bn.nodes():
-                if (
-                    v in c_dict[u]
-                    and not would_cause_cycle(c_dict, v, u, reverse=True)
-                    and len(p_dict[u]) != 3
-                    and (init_nodes is None or not (u in init_nodes))
-                    and (restriction is None or (v, u) in restriction)
-                    and (black_list is None or not ((v, u) in black_list))
-                ):
-                    old_cols = (u,) + tuple(p_dict[v])  # without 'v' as parent
-                    if old_cols not in cache:
-                        cache[old_cols] = mutual_information(data[:, old_cols])
-                    mi_old = cache[old_cols]
-                    new_cols = old_cols + (v,)  # with 'v' as parent
-                    if new_cols not in cache:
-                        cache[new_cols] = mutual_information(data[:, new_cols])
-                    mi_new = cache[new_cols]
-                    delta1 = -1 * nrow * (mi_old - mi_new)
-                    # SCORE FOR 'V' -> losing 'u' as parent
-                    old_cols = (v,) + tuple(p_dict[v])  # with 'u' as parent
-                    if old_cols not in cache:
-                        cache[old_cols] = mutual_information(data[:, old_cols])
-                    mi_old = cache[old_cols]
-                    # without 'u' as parent
-                    new_cols = tuple([u for i in old_cols if i != u])
-                    if new_cols not in cache:
-                        cache[new_cols] = mutual_information(data[:, new_cols])
-                    mi_new = cache[new_cols]
-                    delta2 = nrow * (mi_old - mi_new)
-                    # COMBINED DELTA-SCORES
-                    delta_score = delta1 + delta2
-
-                    if delta_score > max_delta:
-                        if init_edges is None:
-                            if debug:
-                                print("Improved Arc Reversal: ", (u, v))
-                                print("Delta Score: ", delta_score)
-                            max_delta = delta_score
-                            max_operation = "Reversal"
-                            max_arc = (u, v)
-                        else:
-                            if (u, v) in init_edges:
-                                if remove_geo_edges:
-                                    if debug:
-                                        print("Improved Arc Reversal: ", (u, v))
-                                        print("Delta Score: ", delta_score)
-                                    max_delta = delta_score
-                                    max_operation = "Reversal"
-                                    max_arc = (u, v)
-                            else:
-                                if debug:
-                                    print("Improved Arc Reversal: ", (u, v))
-                                    print("Delta Score: ", delta_score)
-                                max_delta = delta_score
-                                max_operation = "Reversal"
-                                max_arc = (u, v)
-
-        if max_delta != 0:
-            improvement = True
-            u, v = max_arc
-            if max_operation == "Addition":
+    def score(cols):
+        if cols not in cache:
+            cache[cols] = mutual_information(data[:, cols])
+        return cache[cols]
+
+    # topological order of initial network breaks ties between equal deltas
+    nodes = list(bn.nodes())
+    order = dict([(n, i) for i, n in enumerate(nodes)])
+
+    # OPERATORS QUEUE
+    # entry: (-delta, operation, order of u, order of v, u, v, version of v)
+    # every delta depends only on parents of 'v', so entry is stale
+    # as soon as parents of 'v' change
+    queue = []
+    version = dict([(n, 0) for n in names])
+
+    # FOR MMHC ALGORITHM -> Edge Restrictions
+    # candidates[v]: allowed parents of 'v', None means any node
+    candidates = dict([(n, None) for n in names])
+    if candidate_parents is not None:
+        for n in names:
+            candidates[n] = set(candidate_parents.get(n, ()))
+    if restriction is not None:
+        allowed_parents = dict([(n, set()) for n in names])
+        for u, v in restriction:
+            allowed_parents[v].add(u)
+        for n in names:
+            if candidates[n] is None:
+                candidates[n] = allowed_parents[n]
+            else:
+                candidates[n] &= allowed_parents[n]
+    init_nodes = set(init_nodes or ())
+    black_list = set(map(tuple, black_list or ()))
+    kept_edges = set(fixed_edges)
+    if not remove_geo_edges:
+        kept_edges.update(map(tuple, init_edges or ()))
+
+    def allowed(u, v):
+        return (
+            v not in init_nodes
+            and (candidates[v] is None or u in candidates[v])
+            and (u, v) not in black_list
+        )
+
+    def removable(u, v):
+        return (u, v) not in kept_edges
+
+    pool = None
+    if n_jobs == 0:
+        raise ValueError("n_jobs must be a positive integer or negative, got 0")
+    n_jobs = effective_n_jobs(n_jobs)
+    if n_jobs != 1:
+        pool = ProcessPoolExecutor(
+            n_jobs, initializer=_init_worker, initargs=(data, mutual_information)
+        )
+
+    def prefetch(families):
+        missing = [cols for cols in dict.fromkeys(families) if cols not in cache]
+        if pool is None or len(missing) < 2:
+            return
+        chunksize = max(1, len(missing) // (4 * n_jobs))
+        for cols, value in zip(
+            missing, pool.map(_score_family, missing, chunksize=chunksize)
+        ):
+            cache[cols] = value
+
+    def operators(v):
+        # candidate operators with child 'v' and families they are scored on
+        old_cols = (v,) + tuple(p_dict[v])
+        for u in p_dict[v]:
+            ### ARC DELETION ###
+            # SCORE FOR 'V' -> losing a parent
+            if removable(u, v):
+                yield 1, u, (old_cols, tuple([i for i in old_cols if i != u]))
+
+            ### ARC REVERSAL ###
+            if allowed(v, u) and removable(u, v):
+                rev_cols = (u,) + tuple(p_dict[v])
+                yield 2, u, (
+                    rev_cols,
+                    rev_cols + (v,),
+                    old_cols,
+                    tuple([u for i in old_cols if i != u]),
+                )
+
+        if len(p_dict[v]) >= max_parents:
+            return
+        for u in nodes if candidates[v] is None else candidates[v]:
+            if u != v and u not in p_dict[v] and allowed(u, v):
+                ### ARC ADDITION ###
+                # SCORE FOR 'V' -> gaining a parent
+                yield 0, u, (old_cols, old_cols + (u,))
+
+    def push_operators(changed):
+        candidates = [(v,) + operator for v in changed for operator in operators(v)]
+        prefetch([cols for *_, families in candidates for cols in families])
+        for v, operation, u, families in candidates:
+            scores = [score(cols) for cols in families]
+            if operation == 2:
+                delta1 = -1 * nrow * (scores[0] - scores[1])
+                delta2 = nrow * (scores[2] - scores[3])
+                # COMBINED DELTA-SCORES
+                delta_score = delta1 + delta2
+            else:
+                delta_score = nrow * (scores[0] - scores[1])
+            if delta_score > 0:
+                entry = (-delta_score, operation, order[u], order[v], u, v, version[v])
+                heappush(queue, entry)
+
+    def pop_best():
+        # operators which are blocked only by acyclicity or parents limit
+        # may become feasible after later moves, so they return to the queue
+        deferred = []
+        best = None
+        while queue:
+            entry = heappop(queue)
+            _, operation, _, _, u, v, stamp = entry
+            if stamp != version[v]:
+                continue
+            deferred.append(entry)
+            if operation == 0:
+                feasible = (
+                    not would_cause_cycle(c_dict, u, v)
+                    and len(p_dict[v]) < max_parents
+                )
+            elif operation == 2:
+                feasible = (
+                    not would_cause_cycle(c_dict, v, u, reverse=True)
+                    and len(p_dict[u]) < max_parents
+                )
+            else:
+                feasible = True
+            if feasible:
+                best = entry
+                break
+        for entry in deferred:
+            heappush(queue, entry)
+        return best
+
+    try:
+        push_operators(nodes)
+
+        _iter = 0
+
+        while True:
+            if debug:
+                print("ITERATION: ", _iter)
+
+            best = pop_best()
+            if best is None:
                 if debug:
+                    print("No Improvement on Iter: ", _iter)
+                break
+
+            neg_delta, operation, _, _, u, v, _ = best
+            max_arc = (u, v)
+            if operation == 0:
+                if debug:
+                    print("Delta Score: ", -neg_delta)
                     print("ADDING: ", max_arc, "\n")
                 c_dict[u].append(v)
                 p_dict[v].append(u)
+                changed = [v]
 
-            elif max_operation == "Deletion":
+            elif operation == 1:
                 if debug:
+                    print("Delta Score: ", -neg_delta)
                     print("DELETING: ", max_arc, "\n")
                 c_dict[u].remove(v)
                 p_dict[v].remove(u)
+                changed = [v]
 
-            elif max_operation == "Reversal":
+            else:
                 if debug:
+                    print("Delta Score: ", -neg_delta)
                     print("REVERSING: ", max_arc, "\n")
                 c_dict[u].remove(v)
                 p_dict[v].remove(u)
                 c_dict[v].append(u)
                 p_dict[u].append(v)
+                changed = [v, u]
 
-        else:
-            if debug:
-                print("No Improvement on Iter: ", _iter)
+            # only operators of nodes with new parents have to be rescored
+            for node in changed:
+                version[node] += 1
+            push_operators(changed)
 
-        ### TEST FOR MAX ITERATION ###
-        _iter += 1
-        if _iter > max_iter:
-            if debug:
-                print("Max Iteration Reached")
-            break
+            ### TEST FOR MAX ITERATION ###
+            _iter += 1
+            if _iter > max_iter:
+                if debug:
+                    print("Max Iteration Reached")
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
     bn = BayesNet(c_dict)
 
@@ -7,6 +7,8 @@ from golem.core.optimisers.graph import OptGraph, OptNode
 from pgmpy.estimators import K2Score
 from pgmpy.models import BayesianNetwork
 
+from bamt.utils.score_cache import CachedStructureScore
+
 
 class CustomGraphModel(OptGraph):
     def evaluate(self, data: pd.DataFrame):
@@ -20,7 +22,7 @@ class CustomGraphNode(OptNode):
         return f'{self.content["name"]}'
 
 
-def K2_metric(graph: CustomGraphModel, data: pd.DataFrame):
+def K2_metric(graph: CustomGraphModel, data: pd.DataFrame, score_cache=None):
     graph_nx, labels = graph_structure_as_nx_graph(graph)
     struct = []
     for meta_edge in graph_nx.edges():
@@ -31,7 +33,10 @@ def K2_metric(graph: CustomGraphModel, data: pd.DataFrame):
     bn_model = BayesianNetwork(struct)
     bn_model.add_nodes_from(data.columns)
 
-    score = K2Score(data).score(bn_model)
+    if score_cache is None:
+        score = K2Score(data).score(bn_model)
+    else:
+        score = CachedStructureScore(K2Score(data), score_cache).score(bn_model)
     return -score
 
 
@@ -84,6 +84,7 @@ class GraphAnalyzer(object):
         self.bn = bn
 
     def _isolate_structure(self, nodes):
+        nodes = set(nodes)
         isolated_edges = []
         for edge in self.bn.edges:
             if edge[0] in nodes and edge[1] in nodes:
@@ -91,14 +92,12 @@ class GraphAnalyzer(object):
         return isolated_edges
 
     def markov_blanket(self, node_name: str):
-        node = self.bn[node_name]
-
-        parents = node.cont_parents + node.disc_parents
-        children = node.children
+        parents = self.bn.parents(node_name)
+        children = self.bn.children(node_name)
         fremd_eltern = []
 
-        for child in node.children:
-            all_parents = self.bn[child].cont_parents + self.bn[child].disc_parents
+        for child in children:
+            all_parents = self.bn.parents(child)
 
             if all_parents == [node_name]:
                 continue
@@ -113,29 +112,27 @@ class GraphAnalyzer(object):
 
     def _collect_height(self, node_name, height):
         nodes = []
-        node = self.bn[node_name]
         if height <= 0:
             return []
 
         if height == 1:
-            return node.disc_parents + node.cont_parents
+            return self.bn.parents(node_name)
 
-        for parent in node.cont_parents + node.disc_parents:
+        for parent in self.bn.parents(node_name):
             nodes.append(parent)
             nodes.extend(self._collect_height(parent, height=height - 1))
         return nodes
 
     def _collect_depth(self, node_name, depth):
         nodes = []
-        node = self.bn[node_name]
 
         if depth <= 0:
             return []
 
         if depth == 1:
-            return node.children
+            return self.bn.children(node_name)
 
-        for child in node.children:
+        for child in self.bn.children(node_name):
             nodes.append(child)
             nodes.extend(self._collect_depth(child, depth=depth - 1))
 
@@ -1,10 +1,12 @@
 import math
+from typing import NamedTuple
 
 import numpy as np
 import pandas as pd
-from scipy import stats
+from gmr import GMM
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy import linalg, sparse, stats
 from scipy.stats.distributions import chi2
-from sklearn.metrics import mutual_info_score
 from sklearn.mixture import GaussianMixture
 from sklearn.preprocessing import OrdinalEncoder
 
@@ -75,6 +77,69 @@ def sum_dist(data, vals, q):
     return dist
 
 
+def _fit_gaussian_mixture(x, n_components):
+    model = GaussianMixture(n_components=n_components, random_state=0)
+    model.fit(x)
+    return model
+
+
+def mixture_components(x, max_comp=10, n_jobs=None, patience=None):
+    """
+    Fit GaussianMixture for 1..max_comp components once and evaluate AIC and BIC
+    on the same models.
+    :param x: array (n_samples, n_features)
+    :param n_jobs: number of threads to fit candidates (None means joblib default)
+    :param patience: stop after this many consecutive component counts
+    without improvement of both criteria (None - fit all candidates)
+    :return: ({"aic": n, "bic": n}, {n: fitted GaussianMixture})
+    """
+    max_comp = min(max_comp, x.shape[0])
+    batch = effective_n_jobs(n_jobs)
+    models = {}
+    scores = {"aic": [], "bic": []}
+    for start in range(1, max_comp + 1, batch):
+        counts = range(start, min(start + batch, max_comp + 1))
+        fitted = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(_fit_gaussian_mixture)(x, i) for i in counts
+        )
+        for i, model in zip(counts, fitted):
+            models[i] = model
+            scores["aic"].append(model.aic(x))
+            scores["bic"].append(model.bic(x))
+        if patience is not None and all(
+            len(values) - 1 - np.argmin(values) >= patience
+            for values in scores.values()
+        ):
+            break
+    best = {method: int(np.argmin(values)) + 1 for method, values in scores.items()}
+    return best, models
+
+
+def select_mixture(x, n_jobs=None, patience=None) -> GaussianMixture:
+    """
+    GaussianMixture with number of components averaged over AIC and BIC
+    (as int((component(aic) + component(bic)) / 2)), taken from the selection sweep.
+    """
+    best, models = mixture_components(x, n_jobs=n_jobs, patience=patience)
+    return models[int((best["aic"] + best["bic"]) / 2)]
+
+
+def fit_mixture(x, n_iter=500, n_jobs=None, patience=None) -> GMM:
+    """
+    gmr GMM with number of components selected by AIC and BIC.
+    EM starts from the parameters of selected sklearn model instead of kmeans++,
+    so it converges in a few iterations.
+    """
+    model = select_mixture(x, n_jobs=n_jobs, patience=patience)
+    gmm = GMM(
+        n_components=model.n_components,
+        priors=model.weights_,
+        means=model.means_,
+        covariances=model.covariances_,
+    )
+    return gmm.from_samples(x, n_iter=n_iter, init_params="kmeans++")
+
+
 def component(data, columns, method):
     n = 1
     max_comp = 10
@@ -85,29 +150,8 @@ def component(data, columns, method):
         x = np.transpose([data[columns[0]].values])
     else:
         x = data[columns].values
-    if method == "aic":
-        lowest_aic = np.infty
-        comp_lowest = 0
-        for i in range(1, max_comp + 1, 1):
-            gm1 = GaussianMixture(n_components=i, random_state=0)
-            gm1.fit(x)
-            aic1 = gm1.aic(x)
-            if aic1 < lowest_aic:
-                lowest_aic = aic1
-                comp_lowest = i
-            n = comp_lowest
-
-    if method == "bic":
-        lowest_bic = np.infty
-        comp_lowest = 0
-        for i in range(1, max_comp + 1, 1):
-            gm1 = GaussianMixture(n_components=i, random_state=0)
-            gm1.fit(x)
-            bic1 = gm1.bic(x)
-            if bic1 < lowest_bic:
-                lowest_bic = bic1
-                comp_lowest = i
-            n = comp_lowest
+    if method in ("aic", "bic"):
+        n = mixture_components(x, max_comp)[0][method]
 
     if method == "LRTS":
         n = lrts_comp(x)
@@ -125,6 +169,119 @@ def component(data, columns, method):
     return n
 
 
+class CompiledMixture(NamedTuple):
+    """
+    Gaussian mixture over [node, *parents] prepared for conditioning on parents.
+    priors: (n_components,) weights of components
+    means: (n_components, n_features) means of components
+    covariances: (n_components, n_features, n_features) covariances of components
+    coef: (n_components, n_features - 1) regression coefficients of node on parents
+    cond_variances: (n_components,) Schur complements cov_yy - cov_yx @ cov_xx^-1 @ cov_xy
+    chol: (n_components, n_features - 1, n_features - 1) Cholesky factors of cov_xx
+    log_norm: (n_components,) log of prior divided by determinant of chol
+    """
+
+    priors: np.ndarray
+    means: np.ndarray
+    covariances: np.ndarray
+    coef: np.ndarray
+    cond_variances: np.ndarray
+    chol: np.ndarray
+    log_norm: np.ndarray
+
+    def condition(self, x):
+        """
+        Condition mixture on parents for every row of x (n, n_features - 1).
+        Returns weights of components (n, n_components), means of node
+        (n, n_components) and variances of node (n_components,) given x.
+        """
+        x = np.asarray(x, dtype=float)
+        if not self.coef.shape[1]:
+            shape = (x.shape[0], len(self.priors))
+            priors = np.broadcast_to(self.priors, shape).copy()
+            return priors, np.broadcast_to(self.means[:, 0], shape).copy(), self.cond_variances
+        diff = x[:, None, :] - self.means[None, :, 1:]
+        cond_means = self.means[:, 0] + np.einsum("nkp,kp->nk", diff, self.coef)
+
+        log_priors = np.empty(cond_means.shape)
+        for k in range(len(self.priors)):
+            normalized = linalg.solve_triangular(self.chol[k], diff[:, k].T, lower=True)
+            log_priors[:, k] = self.log_norm[k] - 0.5 * np.sum(normalized**2, axis=0)
+
+        log_priors -= log_priors.max(axis=1, keepdims=True)
+        cond_priors = np.exp(log_priors)
+        cond_priors /= cond_priors.sum(axis=1, keepdims=True)
+        return cond_priors, cond_means, self.cond_variances
+
+    def sample(self, x=None, size=1):
+        """
+        Draw values of node, one for every row of x (size values if there are no parents).
+        """
+        if x is None:
+            priors = np.broadcast_to(self.priors, (size, len(self.priors)))
+            means = np.broadcast_to(self.means[:, 0], priors.shape)
+            variances = self.covariances[:, 0, 0]
+        else:
+            priors, means, variances = self.condition(x)
+        cumulative = np.cumsum(priors, axis=1)
+        rand = np.random.random((priors.shape[0], 1))
+        components = np.minimum((cumulative < rand).sum(axis=1), priors.shape[1] - 1)
+        return np.random.normal(
+            means[np.arange(priors.shape[0]), components],
+            np.sqrt(np.maximum(variances[components], 0)),
+        )
+
+    def expectation(self, x=None):
+        """
+        Mean of node, for every row of x if mixture is conditioned on parents.
+        """
+        if x is None:
+            return self.priors @ self.means[:, 0]
+        priors, means, _ = self.condition(x)
+        return (priors * means).sum(axis=1)
+
+
+def compile_mixture(means, covariances, priors) -> CompiledMixture:
+    """
+    Convert mixture params (lists as they are stored in distributions) to arrays and
+    precompute everything that doesn't depend on parents values.
+    """
+    means = np.asarray(means, dtype=float)
+    covariances = np.asarray(covariances, dtype=float)
+    priors = np.asarray(priors, dtype=float)
+
+    n_components, n_features = means.shape
+    n_parents = n_features - 1
+    coef = np.empty((n_components, n_parents))
+    cond_variances = np.empty(n_components)
+    chol = np.empty((n_components, n_parents, n_parents))
+    log_norm = np.empty(n_components)
+
+    for k in range(n_components):
+        cov_xx = covariances[k, 1:, 1:]
+        cov_yx = covariances[k, 0, 1:]
+        coef[k] = np.linalg.pinv(cov_xx) @ cov_yx
+        cond_variances[k] = covariances[k, 0, 0] - cov_yx @ coef[k]
+
+        # the same regularization of degenerated covariances as in gmr
+        try:
+            chol[k] = linalg.cholesky(cov_xx, lower=True)
+        except np.linalg.LinAlgError:
+            chol[k] = linalg.cholesky(cov_xx + 1e-3 * np.eye(n_parents), lower=True)
+        chol_det = max(np.prod(np.diag(chol[k])), np.finfo(float).eps)
+        log_norm[k] = np.log(priors[k]) - np.log(chol_det)
+
+    return CompiledMixture(
+        priors,
+        means,
+        covariances,
+        coef,
+        np.maximum(cond_variances, 0),
+        chol,
+        log_norm,
+    )
+
+
 def get_n_nearest(data, columns, corr=False, number_close=5):
     """Returns N nearest neighbors for every column of dataframe, added into list
 
@@ -148,41 +305,223 @@ def get_n_nearest(data, columns, corr=False, number_close=5):
     return groups
 
 
-def get_proximity_matrix(df, proximity_metric) -> pd.DataFrame:
+def _factorize_columns(df: pd.DataFrame):
+    """
+    Integer codes of every column and counts of the codes.
+    Every unique value is a label, as in mutual_info_score.
+    """
+    codes = np.empty(df.shape, dtype=np.int64)
+    counts = []
+    for j, column in enumerate(df.columns):
+        codes[:, j], uniques = pd.factorize(
+            df[column], sort=True, use_na_sentinel=False
+        )
+        counts.append(np.bincount(codes[:, j], minlength=len(uniques)))
+    return codes, counts
+
+
+def _mutual_info_block(codes, counts, i, columns, max_bins=1 << 22) -> np.ndarray:
+    """
+    Mutual information between column i and several columns at once.
+    Joint histograms of all pairs are laid out one after another and counted by one
+    bincount (np.unique if they are too big, e.g. for continuous columns).
+    """
+    n = codes.shape[0]
+    sizes = np.array([len(counts[j]) for j in columns])
+    offsets = np.concatenate(([0], np.cumsum(len(counts[i]) * sizes)))
+    keys = (codes[:, [i]] * sizes + codes[:, columns] + offsets[:-1]).ravel()
+    if offsets[-1] <= max(max_bins, keys.size):
+        joint = np.bincount(keys, minlength=offsets[-1])
+        bins = np.flatnonzero(joint)
+        joint = joint[bins]
+    else:
+        bins, joint = np.unique(keys, return_counts=True)
+
+    # pair of every nonzero cell and its position in the pair's histogram
+    pair = np.searchsorted(offsets, bins, side="right") - 1
+    local = bins - offsets[pair]
+    marginals = np.concatenate([counts[j] for j in columns])
+    starts = np.concatenate(([0], np.cumsum(sizes)))[:-1]
+    a = counts[i][local // sizes[pair]]
+    b = marginals[starts[pair] + local % sizes[pair]]
+
+    terms = joint * (np.log(joint) + np.log(n) - np.log(a) - np.log(b)) / n
+    return np.clip(np.bincount(pair, weights=terms, minlength=len(columns)), 0, None)
+
+
+def _mutual_info_rows(codes, counts, rows) -> list:
+    """
+    Upper triangle rows of mutual information matrix, columns are processed in blocks
+    to bound memory of joint keys.
+    """
+    n, m = codes.shape
+    step = max(1, (1 << 22) // max(n, 1))
+    result = []
+    for i in rows:
+        row = [
+            _mutual_info_block(codes, counts, i, np.arange(start, min(start + step, m)))
+            for start in range(i + 1, m, step)
+        ]
+        result.append(np.concatenate(row) if row else np.empty(0))
+    return result
+
+
+def mutual_info_matrix(df: pd.DataFrame, n_jobs: int = 1) -> np.ndarray:
+    """
+    Matrix of pairwise mutual information of columns (natural log, like
+    sklearn's mutual_info_score). Only upper triangle is computed.
+
+    Args:
+        df (DataFrame): data, every unique value of column is a separate label
+        n_jobs (int): number of processes, rows of matrix are split between them
+    """
+    codes, counts = _factorize_columns(df)
+    n, m = codes.shape
+    matrix = np.zeros((m, m))
+    if n == 0:
+        return matrix
+
+    n_chunks = min(m, effective_n_jobs(n_jobs) * 4) if n_jobs != 1 else 1
+    # rows are interleaved, so chunks get equal parts of the triangle
+    chunks = [range(r, m, n_chunks) for r in range(n_chunks)]
+    if n_chunks == 1:
+        results = [_mutual_info_rows(codes, counts, chunks[0])]
+    else:
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_mutual_info_rows)(codes, counts, rows) for rows in chunks
+        )
+    for rows, values in zip(chunks, results):
+        for i, row in zip(rows, values):
+            matrix[i, i + 1 :] = row
+
+    matrix += matrix.T
+    # mutual information of column with itself is its entropy
+    for i, c in enumerate(counts):
+        c = c[c > 0]
+        matrix[i, i] = np.sum(c * (np.log(n) - np.log(c))) / n
+    return matrix
+
+
+def _entropy(keys: np.ndarray) -> float:
+    """Entropy (natural log) of integer labels."""
+    counts = np.bincount(pd.factorize(keys)[0])
+    return np.log(keys.size) - np.sum(counts * np.log(counts)) / keys.size
+
+
+def _conditional_mutual_info(x, t, z) -> float:
+    """
+    I(x; t | z) = H(x, z) + H(t, z) - H(x, t, z) - H(z) of integer codes.
+    Pairs of labels are factorized again, so keys never overflow.
+    """
+    xz = pd.factorize(z * (x.max() + 1) + x)[0]
+    tz = z * (t.max() + 1) + t
+    xtz = xz * (t.max() + 1) + t
+    return max(_entropy(xz) + _entropy(tz) - _entropy(xtz) - _entropy(z), 0.0)
+
+
+def mmpc_candidates(
+    df: pd.DataFrame, max_candidates: int = 10, alpha: float = 0.05, n_jobs: int = 1
+) -> dict:
+    """
+    Candidate parents and children of every column, forward (max-min) phase
+    of MMPC. Columns dependent on the target by G-test are taken in order of
+    their minimal association with it; the association is conditioned on
+    every previously taken candidate (one at a time) and columns which become
+    independent are dropped. Only 2 * max_candidates columns with the highest
+    mutual information are screened for every target. Result is symmetric
+    (a column is candidate of all its candidates).
+
+    Args:
+        df (DataFrame): data, continuous columns must be discretized first
+        max_candidates (int): maximal number of candidates taken per column
+        alpha (float): significance level of G-test
+        n_jobs (int): number of processes to compute mutual information
+
+    Returns:
+        dict {column: list of candidate columns}
+    """
+    codes, counts = _factorize_columns(df)
+    n, m = codes.shape
+    sizes = [np.count_nonzero(c) for c in counts]
+    mi = mutual_info_matrix(df, n_jobs=n_jobs)
+
+    def dependent(value, dof):
+        return chi2.sf(2 * n * value, max(dof, 1)) < alpha
+
+    selected = [set() for _ in range(m)]
+    for t in range(m):
+        pool = [
+            x
+            for x in np.argsort(-mi[t], kind="stable")
+            if x != t and dependent(mi[t, x], (sizes[x] - 1) * (sizes[t] - 1))
+        ]
+        min_assoc = dict([(x, mi[t, x]) for x in pool[: 2 * max_candidates]])
+        while min_assoc and len(selected[t]) < max_candidates:
+            z = max(min_assoc, key=min_assoc.get)
+            del min_assoc[z]
+            selected[t].add(z)
+            for x in list(min_assoc):
+                value = _conditional_mutual_info(codes[:, x], codes[:, t], codes[:, z])
+                if dependent(value, (sizes[x] - 1) * (sizes[t] - 1) * sizes[z]):
+                    min_assoc[x] = min(min_assoc[x], value)
+                else:
+                    del min_assoc[x]
+
+    for t in range(m):
+        for x in selected[t]:
+            selected[x].add(t)
+    return dict(
+        [
+            (df.columns[t], [df.columns[x] for x in sorted(selected[t])])
+            for t in range(m)
+        ]
+    )
+
+
+def get_proximity_matrix(df, proximity_metric, n_jobs=1) -> pd.DataFrame:
     """Returns matrix of proximity matrix of the dataframe, dataframe must be coded first if it contains
                                                                                                     categorical data
 
     Args:
         df (DataFrame): data
         proximity_metric (str): 'MI' or 'corr'
+        n_jobs (int): number of processes to compute 'MI'
 
     Returns:
         df_distance: mutual information matrix
     """
 
-    encoder = OrdinalEncoder()
-    df_coded = df
-    columnsToEncode = list(df_coded.select_dtypes(include=["category", "object"]))
-
-    df_coded[columnsToEncode] = encoder.fit_transform(df_coded[columnsToEncode])
-
     df_distance = pd.DataFrame(
         data=np.zeros((len(df.columns), len(df.columns))), columns=df.columns
     )
     df_distance.index = df.columns
 
     if proximity_metric == "MI":
-        for c1 in df.columns:
-            for c2 in df.columns:
-                dist = mutual_info_score(df_coded[c1].values, df_coded[c2].values)
-                df_distance.loc[c1, c2] = dist
+        df_distance = pd.DataFrame(
+            mutual_info_matrix(df, n_jobs=n_jobs), index=df.columns, columns=df.columns
+        )
 
     elif proximity_metric == "corr":
+        encoder = OrdinalEncoder()
+        df_coded = df.copy()
+        columnsToEncode = list(df_coded.select_dtypes(include=["category", "object"]))
+        if columnsToEncode:
+            df_coded[columnsToEncode] = encoder.fit_transform(df_coded[columnsToEncode])
         df_distance = df_coded.corr(method="pearson")
 
     return df_distance
 
 
+def _brave_coefficients(a, b, c, d) -> np.ndarray:
+    """
+    Brave coefficients from contingency counts of pairs of columns over groups.
+    """
+    n_groups = a + b + c + d
+    denominator = np.sqrt((a + c) * (b + d)) * np.sqrt((a + b) * (c + d))
+    denominator = np.where(denominator == 0, 0.0000000001, denominator)
+    return (a * n_groups + (a + c) * (a + b)) / denominator
+
+
 def get_brave_matrix(df_columns, proximity_matrix, n_nearest=5) -> pd.DataFrame:
     """Returns matrix Brave coeffitients of the DataFrame, requires proximity measure to be calculated
 
@@ -196,43 +535,141 @@ def get_brave_matrix(df_columns, proximity_matrix, n_nearest=5) -> pd.DataFrame:
         brave_matrix: DataFrame of Brave coefficients
     """
 
-    brave_matrix = pd.DataFrame(
-        data=np.zeros((len(df_columns), len(df_columns))), columns=df_columns
-    )
-    brave_matrix.index = df_columns
-
     groups = get_n_nearest(
         proximity_matrix, df_columns.tolist(), corr=True, number_close=n_nearest
     )
 
-    counter_zeroer = 0.0
-
-    for c1 in df_columns:
-        for c2 in df_columns:
-            a = counter_zeroer
-            b = counter_zeroer
-            c = counter_zeroer
-            d = counter_zeroer
-            if c1 != c2:
-                for g in groups:
-                    if (c1 in g) & (c2 in g):
-                        a += 1
-                    if (c1 in g) & (c2 not in g):
-                        b += 1
-                    if (c1 not in g) & (c2 in g):
-                        c += 1
-                    if (c1 not in g) & (c2 not in g):
-                        d += 1
-
-                if (a + c) * (b + d) != 0 and (a + b) * (c + d) != 0:
-                    br = (a * len(groups) + (a + c) * (a + b)) / (
-                        (math.sqrt((a + c) * (b + d))) * (math.sqrt((a + b) * (c + d)))
-                    )
-                else:
-                    br = (a * len(groups) + (a + c) * (a + b)) / 0.0000000001
-                brave_matrix.loc[c1, c2] = br
+    # membership[g, c]: column c is in group g
+    index = pd.Index(df_columns)
+    membership = np.zeros((len(groups), len(index)))
+    for g, group in enumerate(groups):
+        membership[g, index.get_indexer(group)] = 1
 
-    return brave_matrix
+    # contingency counts of every pair of columns over groups
+    a = membership.T @ membership
+    in_groups = membership.sum(axis=0)
+    b = in_groups[:, None] - a
+    c = in_groups[None, :] - a
+    d = len(groups) - a - b - c
+
+    brave = _brave_coefficients(a, b, c, d)
+    np.fill_diagonal(brave, 0)
+
+    return pd.DataFrame(brave, index=df_columns, columns=df_columns)
+
+
+def _proximity_features(df: pd.DataFrame) -> np.ndarray:
+    """
+    Columns as they enter 'corr' proximity (numeric values, ordinal codes of
+    categorical columns), centered and scaled to unit norm.
+    """
+    features = np.empty(df.shape)
+    for j, column in enumerate(df.columns):
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values):
+            features[:, j] = values.to_numpy(dtype=float)
+        else:
+            features[:, j] = pd.factorize(values, sort=True)[0]
+    features -= features.mean(axis=0)
+    norm = np.linalg.norm(features, axis=0)
+    features /= np.where(norm == 0, 1, norm)
+    return features
+
+
+def approximate_n_nearest(
+    df: pd.DataFrame,
+    proximity_metric: str = "MI",
+    number_close: int = 5,
+    n_candidates: int = None,
+    sketch_size: int = 256,
+    random_state: int = None,
+) -> list:
+    """Approximate get_n_nearest(get_proximity_matrix(df)) for very wide data.
+    Columns are sketched by random projection of rows; their inner products estimate
+    correlations. For every column n_candidates columns with the largest estimates
+    are refined with exact proximity ('MI' or 'corr') and number_close best are kept.
+    Proximity matrix is never stored, memory is O(p * n_candidates) besides data.
+
+    Args:
+        df (DataFrame): data
+        proximity_metric (str): 'MI' or 'corr'
+        number_close (int): number of nearest neighbors
+        n_candidates (int, optional): candidates per column, 4 * number_close by default
+        sketch_size (int): number of random projections
+        random_state (int, optional): seed of projections
+
+    Returns:
+        groups: for every column, the column itself followed by its nearest neighbors
+    """
+    n, p = df.shape
+    columns = df.columns
+    if n_candidates is None:
+        n_candidates = 4 * number_close
+    n_candidates = min(max(n_candidates, number_close), p - 1)
+    if n_candidates <= 0:
+        return [[c] for c in columns]
+
+    features = _proximity_features(df)
+    rng = np.random.default_rng(random_state)
+    sketches = np.zeros((sketch_size, p))
+    for start in range(0, n, 1 << 14):
+        chunk = features[start : start + (1 << 14)]
+        sketches += rng.standard_normal((sketch_size, len(chunk))) @ chunk
+    norm = np.linalg.norm(sketches, axis=0)
+    sketches /= np.where(norm == 0, 1, norm)
+
+    if proximity_metric == "MI":
+        codes, counts = _factorize_columns(df)
+
+    groups = []
+    step = max(1, (1 << 22) // p)
+    for start in range(0, p, step):
+        rows = np.arange(start, min(start + step, p))
+        estimates = sketches[:, rows].T @ sketches
+        if proximity_metric == "MI":
+            # dependence of any sign
+            estimates = np.abs(estimates)
+        estimates[np.arange(len(rows)), rows] = -np.inf
+        candidates = np.argpartition(-estimates, n_candidates - 1, axis=1)
+        for i, row in zip(rows, candidates[:, :n_candidates]):
+            if proximity_metric == "MI":
+                exact = _mutual_info_block(codes, counts, i, row)
+            else:
+                exact = features[:, i] @ features[:, row]
+            best = row[np.argsort(-exact, kind="stable")[:number_close]]
+            groups.append([columns[i]] + columns[best].tolist())
+    return groups
+
+
+def get_sparse_brave_matrix(df_columns, groups) -> sparse.csr_matrix:
+    """Brave coefficients of pairs of columns which share at least one group
+    (other pairs have small coefficients and are not stored).
+
+    Args:
+        df_columns (Index): data.columns
+        groups (list): nearest neighbors of every column (approximate_n_nearest)
+
+    Returns:
+        brave_matrix: sparse matrix of Brave coefficients in order of df_columns
+    """
+    index = pd.Index(df_columns)
+    rows = np.repeat(np.arange(len(groups)), [len(g) for g in groups])
+    cols = index.get_indexer([c for g in groups for c in g])
+    membership = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(len(groups), len(index))
+    )
+
+    a = (membership.T @ membership).tocoo()
+    pairs = a.row != a.col
+    i, j, a = a.row[pairs], a.col[pairs], a.data[pairs]
+    in_groups = np.asarray(membership.sum(axis=0)).ravel()
+    b = in_groups[i] - a
+    c = in_groups[j] - a
+    d = len(groups) - a - b - c
+
+    return sparse.csr_matrix(
+        (_brave_coefficients(a, b, c, d), (i, j)), shape=(len(index), len(index))
+    )
 
 
 def _child_dict(net: list):
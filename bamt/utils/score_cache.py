@@ -0,0 +1,132 @@
+import hashlib
+import os
+import pickle
+from typing import Callable, Hashable, Optional, Sequence
+
+import pandas as pd
+from pgmpy.estimators import StructureScore
+
+
+class ScoreCache(object):
+    """
+    Family scores shared between structure searches on the same data.
+    Key is (metric, child, parents, dataset fingerprint), so one cache can be reused
+    across restarts, different white/black lists and HC/Evo runs.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        :param path: file to persist scores, it is loaded if exists
+        """
+        self.path = path
+        self.scores = {}
+
+        if path is not None and os.path.isfile(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, key):
+        return key in self.scores
+
+    def fingerprint(self, data: pd.DataFrame) -> str:
+        """
+        Hash of dataset content, column names and dtypes.
+        It is computed on every call, so searches keep it for their own data
+        (see FamilyView and CachedStructureScore).
+        """
+        sha = hashlib.sha1()
+        sha.update(str(list(data.columns)).encode())
+        sha.update(str(list(data.dtypes)).encode())
+        sha.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+        return sha.hexdigest()
+
+    def score(
+        self,
+        metric: str,
+        child: Hashable,
+        parents: Hashable,
+        fingerprint: str,
+        func: Callable[[], float],
+    ) -> float:
+        """
+        Return cached score of family or compute it with func.
+        :param parents: tuple if metric depends on order of columns, frozenset otherwise
+        """
+        key = (metric, child, parents, fingerprint)
+        if key not in self.scores:
+            self.scores[key] = func()
+        return self.scores[key]
+
+    def family_view(
+        self, metric: str, columns: Sequence[Hashable], fingerprint: str
+    ) -> "FamilyView":
+        """
+        Dict-like view for searches that address families as tuples of column
+        indexes (child first).
+        """
+        return FamilyView(self, metric, columns, fingerprint)
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        if path is None:
+            raise ValueError("Path to save score cache is not specified.")
+        with open(path, "wb") as f:
+            pickle.dump(self.scores, f, protocol=4)
+
+    def load(self, path: Optional[str] = None):
+        path = path or self.path
+        with open(path, "rb") as f:
+            self.scores.update(pickle.load(f))
+
+
+class FamilyView(object):
+    """
+    Maps tuples of column indexes (child, *parents) to keys of ScoreCache.
+    """
+
+    def __init__(self, cache: ScoreCache, metric, columns, fingerprint):
+        self.cache = cache
+        self.metric = metric
+        self.columns = list(columns)
+        self.fingerprint = fingerprint
+
+    def key(self, cols):
+        names = tuple(self.columns[i] for i in cols)
+        return self.metric, names[0], names[1:], self.fingerprint
+
+    def __contains__(self, cols):
+        return self.key(cols) in self.cache.scores
+
+    def __getitem__(self, cols):
+        return self.cache.scores[self.key(cols)]
+
+    def __setitem__(self, cols, value):
+        self.cache.scores[self.key(cols)] = value
+
+
+class CachedStructureScore(StructureScore):
+    """
+    pgmpy score which takes local scores from ScoreCache.
+    Scores are keyed by class of the wrapped score, so different pgmpy scores
+    can share one cache.
+    """
+
+    def __init__(self, score: StructureScore, cache: ScoreCache):
+        super(CachedStructureScore, self).__init__(
+            score.data, state_names=score.state_names
+        )
+        self.structure_score = score
+        self.cache = cache
+        self.metric = type(score).__name__
+        self.data_fingerprint = cache.fingerprint(score.data)
+
+    def local_score(self, variable, parents):
+        return self.cache.score(
+            self.metric,
+            variable,
+            frozenset(parents),
+            self.data_fingerprint,
+            lambda: self.structure_score.local_score(variable, parents),
+        )
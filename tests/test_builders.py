@@ -1,15 +1,22 @@
 import itertools
 import logging
 import unittest
+from unittest import mock
 
+import numpy as np
 import pandas as pd
+from pgmpy.estimators import BicScore, K2Score
 
 from bamt.builders.builders_base import StructureBuilder, VerticesDefiner
 from bamt.builders.evo_builder import EvoStructureBuilder
-from bamt.builders.hc_builder import HillClimbDefiner
+from bamt.builders.hc_builder import HCStructureBuilder, HillClimbDefiner
+from bamt.builders.partition_builder import PartitionStructureBuilder
+from bamt.networks.big_brave_bn import BigBraveBN
+from bamt.redef_HC import hc
+from bamt.utils.score_cache import CachedStructureScore, ScoreCache
 from bamt.nodes.discrete_node import DiscreteNode
 from bamt.nodes.gaussian_node import GaussianNode
-from bamt.utils.MathUtils import precision_recall
+from bamt.utils.MathUtils import mmpc_candidates, precision_recall
 
 logging.getLogger("builder").setLevel(logging.CRITICAL)
 
@@ -667,6 +674,285 @@ class TestHillClimbDefiner(unittest.TestCase):
 
         self.assertEqual(hcd.skeleton["E"], right_edges)
 
+    def test_apply_group1_n_jobs(self):
+        edges = []
+        for n_jobs in (1, 2, -2):
+            hcd = HillClimbDefiner(
+                data=pd.DataFrame(self.data),
+                descriptor=self.descriptor,
+                scoring_function=("MI",),
+            )
+            hcd.restrict(data=pd.DataFrame(self.data), bl_add=None, init_nodes=None)
+            hcd.apply_group1(
+                data=pd.DataFrame(self.data),
+                progress_bar=False,
+                init_edges=None,
+                remove_init_edges=False,
+                white_list=None,
+                n_jobs=n_jobs,
+            )
+            edges.append(hcd.skeleton["E"])
+
+        self.assertEqual(edges[0], edges[1])
+        self.assertEqual(edges[0], edges[2])
+        with self.assertRaises(ValueError):
+            hcd.apply_group1(
+                data=pd.DataFrame(self.data),
+                progress_bar=False,
+                init_edges=None,
+                remove_init_edges=False,
+                white_list=None,
+                n_jobs=0,
+            )
+
+    def test_apply_group1_score_cache(self):
+        score_cache = ScoreCache()
+        edges = []
+        sizes = []
+        for _ in range(2):
+            hcd = HillClimbDefiner(
+                data=pd.DataFrame(self.data),
+                descriptor=self.descriptor,
+                scoring_function=("MI",),
+            )
+            hcd.restrict(data=pd.DataFrame(self.data), bl_add=None, init_nodes=None)
+            hcd.apply_group1(
+                data=pd.DataFrame(self.data),
+                progress_bar=False,
+                init_edges=None,
+                remove_init_edges=False,
+                white_list=None,
+                score_cache=score_cache,
+            )
+            edges.append(hcd.skeleton["E"])
+            sizes.append(len(score_cache))
+
+        # second search finds every family in cache
+        self.assertGreater(sizes[0], 0)
+        self.assertEqual(sizes[0], sizes[1])
+        self.assertEqual(edges[0], edges[1])
+
+    def test_apply_group1_candidate_parents(self):
+        data = pd.DataFrame(self.data)
+        candidate_parents = mmpc_candidates(data, max_candidates=3)
+        for node, candidates in candidate_parents.items():
+            for candidate in candidates:
+                self.assertIn(node, candidate_parents[candidate])
+
+        hcd = HillClimbDefiner(
+            data=data,
+            descriptor=self.descriptor,
+            scoring_function=("MI",),
+        )
+        hcd.restrict(data=data, bl_add=None, init_nodes=None)
+        hcd.apply_group1(
+            data=data,
+            progress_bar=False,
+            init_edges=None,
+            remove_init_edges=False,
+            white_list=None,
+            max_parents=1,
+            candidate_parents=candidate_parents,
+        )
+
+        parents = {}
+        for u, v in hcd.skeleton["E"]:
+            self.assertIn(u, candidate_parents[v])
+            parents[v] = parents.get(v, 0) + 1
+        self.assertTrue(all(n <= 1 for n in parents.values()))
+
+    def test_partition_cluster(self):
+        clusters = PartitionStructureBuilder.cluster(
+            5, [(0, 1), (1, 2), (2, 3), (3, 4)], np.array([4.0, 3.0, 1.0, 2.0]), 2
+        )
+        self.assertEqual(sorted(clusters), [[0, 1], [2], [3, 4]])
+
+    def test_partition_build(self):
+        data = pd.DataFrame(self.data)
+        brave = BigBraveBN()
+        brave.set_possible_edges_by_brave(data)
+
+        builder = PartitionStructureBuilder(
+            data=data,
+            descriptor=self.descriptor,
+            scoring_function=("MI",),
+            regressor=None,
+            has_logit=True,
+            use_mixture=False,
+        )
+        builder.build(
+            data=data,
+            progress_bar=False,
+            classifier=None,
+            regressor=None,
+            max_cluster_size=3,
+            brave=brave,
+        )
+
+        self.assertEqual(sorted(sum(builder.clusters, [])), sorted(data.columns))
+        self.assertTrue(all(len(cluster) <= 3 for cluster in builder.clusters))
+        self.assertTrue(builder.skeleton["E"])
+        cluster_of = {
+            c: k for k, cluster in enumerate(builder.clusters) for c in cluster
+        }
+        for u, v in builder.skeleton["E"]:
+            if cluster_of[u] != cluster_of[v]:
+                self.assertIn((u, v), brave.possible_edges)
+
+    def test_partition_final_pass(self):
+        data = pd.DataFrame(self.data)
+        builder = PartitionStructureBuilder(
+            data=data,
+            descriptor=self.descriptor,
+            scoring_function=("MI",),
+            regressor=None,
+            has_logit=True,
+            use_mixture=False,
+        )
+        score_cache = ScoreCache()
+        init_edges = [("Gross", "Depth"), ("Period", "Lithology")]
+        with mock.patch.object(
+            HCStructureBuilder,
+            "build",
+            autospec=True,
+            side_effect=HCStructureBuilder.build,
+        ) as build:
+            builder.build(
+                data=data,
+                progress_bar=False,
+                classifier=None,
+                regressor=None,
+                params={"init_edges": init_edges, "remove_init_edges": True},
+                max_cluster_size=3,
+                score_cache=score_cache,
+            )
+        cluster_of = {
+            c: k for k, cluster in enumerate(builder.clusters) for c in cluster
+        }
+        self.assertEqual(cluster_of["Period"], cluster_of["Lithology"])
+        self.assertNotEqual(cluster_of["Gross"], cluster_of["Depth"])
+
+        local_calls = [
+            call
+            for call in build.call_args_list
+            if not isinstance(call.args[0], PartitionStructureBuilder)
+        ]
+        self.assertTrue(local_calls)
+        # clusters are learned with empty caches, their scores are merged
+        for call in local_calls:
+            local_cache = call.kwargs["score_cache"]
+            self.assertIsNot(local_cache, score_cache)
+            self.assertGreater(len(local_cache), 0)
+            self.assertLessEqual(local_cache.scores.items(), score_cache.scores.items())
+
+        # user's edges are still removable, structures of clusters are fixed
+        self.assertTrue(builder.params["remove_init_edges"])
+        self.assertEqual(builder.params["init_edges"], [("Gross", "Depth")])
+        local_edges = set(
+            tuple(edge)
+            for call in local_calls
+            for edge in call.args[0].skeleton["E"]
+        )
+        self.assertEqual(set(builder.params["fixed_edges"]), local_edges)
+        self.assertGreater(len(score_cache), 0)
+
+
+class TestHC(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        x = rng.normal(size=(200, 5))
+        x[:, 1] += x[:, 0]
+        x[:, 2] += 0.8 * x[:, 1] - 0.5 * x[:, 3]
+        x[:, 4] += x[:, 2]
+        self.data = pd.DataFrame(x, columns=list("abcde"))
+        self.data["f"] = (self.data["a"] > 0).astype(int) + (rng.random(200) < 0.3)
+        self.data["g"] = (self.data["f"] + rng.integers(0, 2, 200)) % 3
+
+    def test_frozen_edges(self):
+        # edges of the full rescan search before the delta-score heap, any change
+        # of tie-breaking or deferral of operators shows up here
+        mi_edges = [
+            (2, 0),
+            (2, 1),
+            (3, 2),
+            (3, 4),
+            (3, 6),
+            (5, 3),
+            (6, 0),
+            (6, 1),
+            (6, 2),
+            (6, 4),
+        ]
+        right_edges = {
+            "MI": mi_edges,
+            "LL": mi_edges,
+            "BIC": [
+                (1, 2),
+                (2, 0),
+                (3, 0),
+                (3, 1),
+                (3, 4),
+                (3, 6),
+                (5, 1),
+                (5, 2),
+                (5, 3),
+                (5, 4),
+                (5, 6),
+                (6, 0),
+                (6, 1),
+                (6, 2),
+                (6, 4),
+            ],
+            "AIC": [
+                (1, 2),
+                (2, 0),
+                (3, 0),
+                (3, 1),
+                (3, 2),
+                (3, 4),
+                (3, 6),
+                (4, 1),
+                (5, 3),
+                (5, 4),
+                (5, 6),
+                (6, 0),
+                (6, 1),
+                (6, 2),
+                (6, 4),
+            ],
+        }
+        for metric, edges in right_edges.items():
+            bn = hc(self.data, metric=metric)
+            result = sorted((u, v) for v in bn.nodes() for u in bn.F[v]["parents"])
+            self.assertEqual(result, edges, metric)
+
+
+class TestScoreCache(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.data = pd.DataFrame(
+            rng.integers(0, 3, size=(200, 3)), columns=["a", "b", "c"]
+        ).astype(str)
+
+    def test_fingerprint_inplace_change(self):
+        score_cache = ScoreCache()
+        fingerprint = score_cache.fingerprint(self.data)
+        self.data["a"] = self.data["b"]
+        self.assertNotEqual(score_cache.fingerprint(self.data), fingerprint)
+        self.assertEqual(
+            score_cache.fingerprint(self.data), ScoreCache().fingerprint(self.data)
+        )
+
+    def test_structure_scores_share_cache(self):
+        score_cache = ScoreCache()
+        for score in (K2Score, BicScore):
+            cached = CachedStructureScore(score(self.data), score_cache)
+            self.assertEqual(
+                cached.local_score("a", ["b"]),
+                score(self.data).local_score("a", ["b"]),
+            )
+        self.assertEqual(len(score_cache), 2)
+
 
 class TestEvoStructureBuilder(unittest.TestCase):
     def setUp(self):
@@ -93,6 +93,22 @@ class TestGraphAnalyzer(unittest.TestCase):
             without_children,
         )
 
+    def test_topology(self):
+        order = [node.name for node in self.bn.topological_order()]
+        self.assertEqual(sorted(order), sorted(self.bn.nodes_names))
+        for node1, node2 in self.bn.edges:
+            self.assertLess(order.index(node1), order.index(node2))
+
+        self.assertEqual(self.bn["Node7"].name, "Node7")
+        self.assertIsNone(self.bn["Node10"])
+        self.assertEqual(self.bn.parents("Node1"), ["Node0", "Node8"])
+        self.assertEqual(self.bn.children("Node0"), ["Node1", "Node2"])
+
+        self.bn.nodes = [node for node in self.bn.nodes if node.name != "Node7"]
+        self.assertIsNone(self.bn["Node7"])
+        self.assertEqual(self.bn.parents("Node0"), [])
+        self.assertEqual(self.bn.children("Node4"), [])
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
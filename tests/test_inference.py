@@ -0,0 +1,100 @@
+import itertools
+import logging
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bamt.inference.factor import Factor
+from bamt.networks.discrete_bn import DiscreteBN
+
+logging.getLogger("network").setLevel(logging.CRITICAL)
+
+
+class TestFactor(unittest.TestCase):
+    def test_product_marginalize(self):
+        a = Factor(["x", "y"], np.array([[0.1, 0.9], [0.4, 0.6]]))
+        b = Factor(["y", "z"], np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]))
+
+        ab = a.product(b)
+        self.assertEqual(ab.variables, ("x", "y", "z"))
+        self.assertEqual(ab.values.shape, (2, 2, 3))
+        self.assertAlmostEqual(ab.values[1, 0, 2], 0.4 * 3.0)
+
+        x = ab.marginalize(["y", "z"])
+        np.testing.assert_allclose(x.values, [0.1 * 6 + 0.9 * 15, 0.4 * 6 + 0.6 * 15])
+        np.testing.assert_allclose(a.reduce({"x": 1}).values, [0.4, 0.6])
+        np.testing.assert_allclose(a.maximize(["x"]).values, [0.4, 0.9])
+
+
+class TestDiscreteBNInference(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 2000
+        a = rng.choice(["0", "1", "2"], n)
+        b = rng.choice(["0", "1"], n)
+        c = np.where((a == "0") & (b == "1"), "1", rng.choice(["0", "1"], n))
+        d = np.where(c == "1", "2", rng.choice(["0", "1", "2"], n))
+        e = np.where(a == "2", "1", rng.choice(["0", "1"], n))
+        f = np.where((d == "0") & (e == "1"), "1", "0")
+        self.data = pd.DataFrame(dict(a=a, b=b, c=c, d=d, e=e, f=f))
+
+        self.bn = DiscreteBN()
+        self.bn.add_nodes({"types": {k: "disc" for k in self.data}, "signs": {}})
+        self.bn.set_structure(
+            edges=[
+                ("a", "c"),
+                ("b", "c"),
+                ("c", "d"),
+                ("a", "e"),
+                ("d", "f"),
+                ("e", "f"),
+            ]
+        )
+        self.bn.fit_parameters(self.data)
+
+    def joint(self):
+        names = self.bn.nodes_names
+        states = [self.bn.distributions[name]["vals"] for name in names]
+        rows = []
+        for comb in itertools.product(*states):
+            assignment = dict(zip(names, comb))
+            p = 1.0
+            for node, values in zip(self.bn.nodes, states):
+                pvals = [assignment[parent] for parent in node.disc_parents]
+                dist = node.get_dist(self.bn.distributions[node.name], pvals)
+                p *= dist[values.index(assignment[node.name])]
+            rows.append({**assignment, "p": p})
+        return pd.DataFrame(rows)
+
+    def test_query(self):
+        joint = self.joint()
+        evidence = {"f": "1", "b": "0"}
+        subset = joint[(joint["f"] == "1") & (joint["b"] == "0")]
+
+        for method in ("junction_tree", "variable_elimination"):
+            result = self.bn.query(["a", "c", "d"], evidence=evidence, method=method)
+            for name, dist in result.items():
+                expected = subset.groupby(name)["p"].sum() / subset["p"].sum()
+                for value, p in dist.items():
+                    self.assertAlmostEqual(p, expected.get(value, 0))
+
+        self.assertIs(self.bn.junction_tree(), self.bn.junction_tree())
+
+    def test_map_query(self):
+        joint = self.joint()
+        subset = joint[joint["f"] == "1"]
+        free = [name for name in self.bn.nodes_names if name != "f"]
+
+        self.assertEqual(
+            self.bn.map_query(evidence={"f": "1"}),
+            subset.loc[subset["p"].idxmax(), free].to_dict(),
+        )
+        self.assertEqual(
+            self.bn.map_query(["c"], evidence={"f": "1"}),
+            {"c": subset.groupby("c")["p"].sum().idxmax()},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
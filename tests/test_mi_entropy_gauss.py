@@ -0,0 +1,99 @@
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bamt.external.pyBN.utils.independence_tests import entropy
+from bamt.mi_entropy_gauss import entropy_all, entropy_cond, entropy_gauss
+
+
+def reference_entropy_cond(data, column_cont, column_disc, method, clamp_every_step):
+    """
+    Conditional entropy computed as before grouping by codes: every combination
+    of discrete values filters the data separately (nan never matches the filter).
+    """
+    data_disc = data[column_disc]
+    h_gauss = entropy_gauss(data[column_cont])
+    combs = {}
+    for i in range(len(data_disc)):
+        row = data_disc.iloc[i]
+        comb = ", ".join(str(val) for val in row)
+        if comb not in combs:
+            combs[comb] = [list(row), 0]
+        combs[comb][1] += 1
+
+    h_cond = 0.0
+    for values, count in combs.values():
+        mask = np.ones(len(data), dtype=bool)
+        for column, value in zip(column_disc, values):
+            mask &= (data[column] == value).to_numpy()
+        if count == 1:
+            if method in ("BIC", "AIC"):
+                h_cond += count / len(data_disc) * h_gauss
+            else:
+                h_cond += count / len(data_disc) * sys.float_info.max
+        else:
+            h_cond += count / len(data_disc) * entropy_gauss(data[column_cont][mask])
+        if clamp_every_step and method in ("BIC", "AIC") and h_cond > h_gauss:
+            h_cond = h_gauss
+    if method in ("BIC", "AIC") and h_cond > h_gauss:
+        h_cond = h_gauss
+    return h_cond
+
+
+class TestEntropyGroups(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 60
+        self.data = pd.DataFrame(
+            {
+                "x": rng.normal(size=n),
+                "y": rng.normal(size=n),
+                "z": rng.normal(size=n),
+                "a": rng.integers(0, 3, n),
+                "b": rng.integers(0, 2, n),
+            }
+        )
+        self.data["y"] += self.data["x"]
+        # combinations met once
+        self.data.loc[5, "b"] = 7
+        self.data.loc[n - 1, "b"] = 9
+
+        self.data_nan = self.data.copy()
+        self.data_nan["a"] = self.data_nan["a"].astype(object)
+        self.data_nan.loc[:3, "a"] = np.nan
+        self.data_nan.loc[10, "x"] = np.nan
+
+    def test_entropy_all(self):
+        for data in (self.data, self.data_nan):
+            for method in ("MI", "BIC"):
+                for columns in (["x", "a"], ["x", "y", "a"], ["x", "y", "z", "a", "b"]):
+                    column_cont = [c for c in columns if c in ("x", "y", "z")]
+                    column_disc = [c for c in columns if c in ("a", "b")]
+                    expected = reference_entropy_cond(
+                        data, column_cont, column_disc, method, True
+                    )
+                    expected += entropy(data[column_disc].values)
+                    self.assertAlmostEqual(
+                        entropy_all(data[columns], method) / expected, 1, places=9
+                    )
+
+    def test_entropy_cond(self):
+        for data in (self.data, self.data_nan):
+            for method in ("MI", "BIC"):
+                for column_cont in (["x"], ["x", "y"], ["x", "y", "z"]):
+                    for column_disc in (["a"], ["a", "b"]):
+                        expected = reference_entropy_cond(
+                            data, column_cont, column_disc, method, False
+                        )
+                        self.assertAlmostEqual(
+                            entropy_cond(data, column_cont, column_disc, method)
+                            / expected,
+                            1,
+                            places=9,
+                        )
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
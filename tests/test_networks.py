@@ -1,20 +1,32 @@
 import json
 import logging
 import pathlib as pl
+import tempfile
 import unittest
 
+import numpy as np
 import pandas as pd
 from catboost import CatBoostRegressor
 from sklearn import preprocessing as pp
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mutual_info_score
 from sklearn.tree import DecisionTreeRegressor
 
 import bamt.preprocessors as bp
+from bamt.networks.big_brave_bn import BigBraveBN
 from bamt.networks.composite_bn import CompositeBN
 from bamt.networks.hybrid_bn import BaseNetwork, HybridBN
 from bamt.nodes.discrete_node import DiscreteNode
 from bamt.nodes.gaussian_node import GaussianNode
-from bamt.utils.MathUtils import precision_recall
+from bamt.nodes.mixture_gaussian_node import MixtureGaussianNode
+from bamt.utils.MathUtils import (
+    approximate_n_nearest,
+    get_brave_matrix,
+    get_n_nearest,
+    get_proximity_matrix,
+    get_sparse_brave_matrix,
+    precision_recall,
+)
 from bamt.utils.composite_utils.CompositeGeneticOperators import (
     custom_mutation_add_model,
     custom_crossover_all_model,
@@ -211,6 +223,146 @@ class TestBaseNetwork(TestCaseBase):
         # bn.set_structure(info=self.descriptor, nodes=self.nodes, edges=self.edges)
         # bn.get_info(as_df=False)
 
+    def prepare_streaming_bn_and_data(self):
+        shape = 500
+        node0 = np.random.normal(1.5, 4, shape)
+        node1 = np.random.choice(["cat1", "cat2", "cat3"], shape)
+        data = pd.DataFrame(
+            {
+                "Node0": node0,
+                "Node1": node1,
+                "Node2": 2 * node0 + np.random.normal(0, 1, shape),
+                "Node3": np.where(
+                    node1 == "cat1", "cat4", np.random.choice(["cat4", "cat5"], shape)
+                ),
+            }
+        )
+        descriptor = {
+            "types": {"Node0": "cont", "Node1": "disc", "Node2": "cont", "Node3": "disc"},
+            "signs": {"Node0": "pos", "Node2": "pos"},
+        }
+        nodes = [
+            GaussianNode(name="Node0"),
+            DiscreteNode(name="Node1"),
+            GaussianNode(name="Node2"),
+            DiscreteNode(name="Node3"),
+        ]
+        self.bn.set_structure(
+            info=descriptor, nodes=nodes, edges=[("Node0", "Node2"), ("Node1", "Node3")]
+        )
+        return data
+
+    def assertSameParameters(self, partial, full):
+        for node in ["Node1", "Node3"]:
+            self.assertEqual(partial[node]["vals"], full[node]["vals"])
+        np.testing.assert_allclose(partial["Node1"]["cprob"], full["Node1"]["cprob"])
+        self.assertEqual(partial["Node3"]["cprob"].keys(), full["Node3"]["cprob"].keys())
+        for key, dist in full["Node3"]["cprob"].items():
+            np.testing.assert_allclose(partial["Node3"]["cprob"][key], dist)
+
+        self.assertAlmostEqual(partial["Node0"]["mean"], full["Node0"]["mean"])
+        self.assertAlmostEqual(partial["Node0"]["variance"], full["Node0"]["variance"])
+        self.assertAlmostEqual(partial["Node2"]["variance"], full["Node2"]["variance"])
+        np.testing.assert_allclose(
+            partial["Node2"]["regressor_obj"].predict([[1.0]]),
+            full["Node2"]["regressor_obj"].predict([[1.0]]),
+        )
+
+    def test_partial_fit(self):
+        data = self.prepare_streaming_bn_and_data()
+        self.bn.fit_parameters(
+            data.iloc[:300].reset_index(drop=True), keep_statistics=True
+        )
+        self.bn.partial_fit(data.iloc[300:].reset_index(drop=True))
+        partial = self.bn.distributions
+
+        self.bn.distributions = {}
+        self.bn.fit_parameters(data)
+        self.assertSameParameters(partial, self.bn.distributions)
+
+    def test_partial_fit_lazy_statistics(self):
+        data = self.prepare_streaming_bn_and_data()
+        self.bn.fit_parameters(data.iloc[:200].reset_index(drop=True))
+        self.assertEqual(self.bn._statistics, {})
+
+        # statistics are computed on the first call from full_data
+        self.bn.partial_fit(
+            data.iloc[200:300].reset_index(drop=True),
+            full_data=data.iloc[:300].reset_index(drop=True),
+        )
+        self.bn.partial_fit(data.iloc[300:].reset_index(drop=True))
+        partial = self.bn.distributions
+
+        self.bn.distributions = {}
+        self.bn.fit_parameters(data)
+        self.assertSameParameters(partial, self.bn.distributions)
+
+    def test_fit_parameters_chunked(self):
+        data = self.prepare_streaming_bn_and_data()
+        self.bn.fit_parameters(data)
+        full = self.bn.distributions
+
+        self.bn.distributions = {}
+        self.bn.fit_parameters_chunked(data.iloc[i : i + 128] for i in range(0, 500, 128))
+        self.assertSameParameters(self.bn.distributions, full)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = pl.Path(directory) / "chunks.csv"
+            data.to_csv(path, index=False)
+            self.bn.distributions = {}
+            self.bn.fit_parameters_chunked(str(path), chunksize=100)
+        self.assertSameParameters(self.bn.distributions, full)
+
+    def test_fit_parameters_n_jobs(self):
+        data = self.prepare_streaming_bn_and_data()
+        self.bn.fit_parameters(data)
+        sequential = self.bn.distributions
+
+        self.bn.distributions = {}
+        self.bn.fit_parameters(data, n_jobs=2)
+        self.assertEqual(list(self.bn.distributions), self.bn.nodes_names)
+        self.assertSameParameters(self.bn.distributions, sequential)
+        self.assertGreater(
+            self.bn._fit_cost(self.bn["Node2"], data),
+            self.bn._fit_cost(self.bn["Node3"], data),
+        )
+
+    def test_refit_changed(self):
+        data = self.prepare_streaming_bn_and_data()
+        self.bn.fit_parameters(data)
+        self.assertEqual(self.bn.changed_nodes(), [])
+        before = dict(self.bn.distributions)
+
+        self.bn.set_structure(
+            edges=[("Node0", "Node2"), ("Node1", "Node3"), ("Node1", "Node2")]
+        )
+        self.assertEqual([node.name for node in self.bn.changed_nodes()], ["Node2"])
+        self.assertEqual(self.bn.refit_changed(data), ["Node2"])
+        self.assertEqual(self.bn.changed_nodes(), [])
+
+        for node in ["Node0", "Node1", "Node3"]:
+            self.assertIs(self.bn.distributions[node], before[node])
+        self.assertIn("hybcprob", self.bn.distributions["Node2"])
+
+    def test_fit_parameters_mixture_options(self):
+        data = pd.DataFrame(
+            {
+                "Node0": np.random.normal(0, 1, 200),
+                "Node1": np.random.choice(["cat1", "cat2"], 200),
+            }
+        )
+        self.bn.use_mixture = True
+        self.bn.set_structure(
+            info={"types": {"Node0": "cont", "Node1": "disc"}, "signs": {}},
+            nodes=[MixtureGaussianNode(name="Node0"), DiscreteNode(name="Node1")],
+            edges=[],
+        )
+        self.bn.fit_parameters(data, mixture_n_jobs=2, mixture_patience=2)
+
+        self.assertEqual(self.bn["Node0"].n_jobs, 2)
+        self.assertEqual(self.bn["Node0"].patience, 2)
+        self.assertAlmostEqual(sum(self.bn.distributions["Node0"]["coef"]), 1)
+
     def test_joblib_pathsave(self):
         hack_data = self.prepare_bn_and_data()
         self.bn.fit_parameters(hack_data)
@@ -641,6 +793,10 @@ class TestBaseNetwork(TestCaseBase):
         self.bn.fit_parameters(pd.DataFrame.from_records(data))
         self.assertIsNotNone(self.bn.sample(50, as_df=False, progress_bar=False))
 
+        sample = self.bn.sample(50, progress_bar=False, vectorized=True)
+        self.assertEqual(sample.shape, (50, len(nodes)))
+        self.assertEqual(sample.columns.to_list(), [node.name for node in nodes])
+
     def test_predict(self):
         seq = {
             "Tectonic regime": [
@@ -1057,9 +1213,90 @@ class TestBaseNetwork(TestCaseBase):
             for item in v:
                 self.assertFalse(pd.isna(item))
 
+        vectorized = self.bn.predict(
+            data.iloc[:, :3], progress_bar=False, vectorized=True
+        )
+        self.assertEqual(vectorized.keys(), result.keys())
+        for key, v in vectorized.items():
+            self.assertEqual(len(v), len(result[key]))
+            for item in v:
+                self.assertFalse(pd.isna(item))
+
+        gaps = data[self.bn.nodes_names].astype(float)
+        gaps.iloc[::2, 1] = np.nan
+        gaps.iloc[1::4, 3] = np.nan
+        filled, failed = self.bn.fill_gaps(gaps)
+        self.assertTrue(gaps.isna().any().any())
+        self.assertEqual(filled.shape[0] + len(failed), gaps.shape[0])
+        self.assertFalse(filled.isna().any().any())
 
-class TestBigBraveBN(unittest.SkipTest):
-    pass
+
+class TestBigBraveBN(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        shape = 1000
+        a = rng.choice(["a1", "a2", "a3"], shape)
+        self.data = pd.DataFrame(
+            {
+                "A": a,
+                "B": np.where(a == "a1", "b1", rng.choice(["b1", "b2"], shape)),
+                "C": rng.integers(0, 4, shape),
+                "D": rng.normal(0, 1, shape).round(1),
+            }
+        )
+
+    def test_proximity_matrix(self):
+        expected = np.array(
+            [
+                [mutual_info_score(self.data[c1], self.data[c2]) for c2 in self.data]
+                for c1 in self.data
+            ]
+        )
+        for n_jobs in (1, 2):
+            proximity = get_proximity_matrix(self.data, "MI", n_jobs=n_jobs)
+            self.assertEqual(list(proximity.index), list(self.data.columns))
+            np.testing.assert_allclose(proximity.values, expected, atol=1e-12)
+
+    def test_brave_matrix(self):
+        proximity = get_proximity_matrix(self.data, "MI")
+        brave = get_brave_matrix(self.data.columns, proximity, n_nearest=1)
+        groups = [set(proximity[c].nlargest(2).index) for c in self.data]
+
+        for c1 in self.data:
+            for c2 in self.data:
+                if c1 == c2:
+                    self.assertEqual(brave.loc[c1, c2], 0)
+                    continue
+                a = sum(c1 in g and c2 in g for g in groups)
+                b = sum(c1 in g and c2 not in g for g in groups)
+                c = sum(c1 not in g and c2 in g for g in groups)
+                d = len(groups) - a - b - c
+                expected = (a * len(groups) + (a + c) * (a + b)) / max(
+                    np.sqrt((a + c) * (b + d) * (a + b) * (c + d)), 1e-10
+                )
+                self.assertAlmostEqual(brave.loc[c1, c2], expected)
+
+        bn = BigBraveBN(n_nearest=1)
+        bn.set_possible_edges_by_brave(self.data)
+        self.assertIn(("A", "B"), bn.possible_edges)
+        self.assertIn(("B", "A"), bn.possible_edges)
+
+    def test_approximate(self):
+        proximity = get_proximity_matrix(self.data, "MI")
+        exact = get_n_nearest(proximity, list(self.data.columns), True, 1)
+        # every column is a candidate, so only refinement decides
+        groups = approximate_n_nearest(self.data, "MI", 1, random_state=0)
+        self.assertEqual(groups, exact)
+
+        dense = get_brave_matrix(self.data.columns, proximity, n_nearest=1).values
+        brave = get_sparse_brave_matrix(self.data.columns, groups).toarray()
+        shared = brave > 0
+        self.assertTrue(shared.any())
+        np.testing.assert_allclose(brave[shared], dense[shared])
+
+        bn = BigBraveBN(n_nearest=1, approximate=True, random_state=0)
+        bn.set_possible_edges_by_brave(self.data)
+        self.assertIn(("A", "B"), bn.possible_edges)
 
 
 class TestCompositeNetwork(unittest.TestCase):
@@ -1,11 +1,14 @@
 import logging
+import pickle
 import unittest
 
 import numpy as np
 import pandas as pd
+from sklearn.mixture import GaussianMixture
 
 from bamt.networks.hybrid_bn import HybridBN
 from bamt.nodes import *
+from bamt.utils.MathUtils import fit_mixture, mixture_components, select_mixture
 
 logging.getLogger("nodes").setLevel(logging.CRITICAL)
 
@@ -127,6 +130,20 @@ class TestBaseNode(MyTest):
         self.assertFalse(test == first)
         self.assertTrue(test == test_clone)
 
+    def test_slots(self):
+        for node in self.bn.nodes:
+            self.assertFalse(hasattr(node, "__dict__"), msg=node.type)
+            self.assertEqual(node.parents, tuple(node.cont_parents + node.disc_parents))
+
+        node = gaussian_node.GaussianNode(name="node0")
+        node.disc_parents = ["node1"]
+        node.cont_parents = ["node2", "node3"]
+        self.assertEqual(node.parents, ("node2", "node3", "node1"))
+
+        clone = pickle.loads(pickle.dumps(node))
+        self.assertTrue(clone == node)
+        self.assertEqual(clone.parents, node.parents)
+
     def test_get_dist_mixture(self):
         hybrid_bn = HybridBN(use_mixture=True, has_logit=True)
 
@@ -221,6 +238,48 @@ class TestDiscreteNode(unittest.TestCase):
         self.assertTrue([self.node.predict(params, pvals) in params["vals"]])
         self.assertRaises(KeyError, self.node.predict, params, ["bad", "values"])
 
+    def test_choose_batch(self):
+        params = self.node.fit_parameters(pd.DataFrame.from_records(self.data_dict))
+        pvals = np.array([["cat4", "cat7"], ["cat5", "cat9"]] * 50, dtype=object)
+
+        values = self.node.choose_batch(params, pvals)
+        self.assertEqual(values.shape, (100,))
+        self.assertTrue(all(value in params["vals"] for value in values))
+
+    def test_compile_cprob(self):
+        params = self.node.fit_parameters(pd.DataFrame.from_records(self.data_dict))
+        combinations = [eval(key) for key in params["cprob"].keys()]
+        pvals = np.array(combinations, dtype=object)
+
+        compiled = self.node.compile_cprob(params)
+        for dist, comb in zip(compiled.gather(pvals), combinations):
+            self.assertEqual(list(dist), self.node.get_dist(params, comb))
+
+        self.assertIs(self.node.compiled_cprob(params), self.node.compiled_cprob(params))
+        self.assertRaises(
+            KeyError, self.node.predict_batch, params, np.array([["bad", "values"]])
+        )
+
+    def test_sparse(self):
+        data = pd.DataFrame.from_records(self.data_dict)
+        data = data[(data["node4"] != "cat4") | (data["node5"] != "cat7")]
+        dense = self.node.fit_parameters(data)
+
+        self.node.sparse = True
+        sparse = self.node.fit_parameters(data)
+        self.assertEqual(len(sparse["cprob"]), len(data.groupby(["node4", "node5"])))
+        self.assertEqual(sparse["default"], dense["cprob"]["['cat4', 'cat7']"])
+
+        pvals = np.array(
+            [eval(key) for key in dense["cprob"].keys()] + [["bad", "values"]],
+            dtype=object,
+        )
+        for dist, comb in zip(self.node.compile_cprob(sparse).gather(pvals), pvals):
+            self.assertEqual(list(dist), self.node.get_dist(sparse, list(comb)))
+            if str(list(comb)) in dense["cprob"]:
+                self.assertEqual(list(dist), dense["cprob"][str(list(comb))])
+        self.assertIn(self.node.predict(sparse, ["bad", "values"]), sparse["vals"])
+
 
 class TestGaussianNode(unittest.TestCase):
     def setUp(self):
@@ -271,6 +330,14 @@ class TestGaussianNode(unittest.TestCase):
         self.assertTrue(isinstance(self.node.predict(params, pvals), float))
         self.assertRaises(ValueError, self.node.predict, params, ["bad", "values"])
 
+    def test_choose_batch(self):
+        params = self.node.fit_parameters(pd.DataFrame.from_records(self.data_dict))
+        pvals = np.array([[1.05, 1.95]] * 100, dtype=object)
+
+        values = self.node.choose_batch(params, pvals)
+        self.assertEqual(values.shape, (100,))
+        self.assertFalse(np.isnan(values).any())
+
 
 class TestConditionalGaussianNode(unittest.TestCase):
     def setUp(self):
@@ -348,6 +415,32 @@ class TestConditionalGaussianNode(unittest.TestCase):
         self.assertTrue(isinstance(self.node.predict(params, pvals), float))
         self.assertRaises(KeyError, self.node.predict, params, ["bad", "values"])
 
+    def test_batch(self):
+        pvals = np.array([[1.05, 1.95, "cat4", "cat7"]] * 10, dtype=object)
+        params = self.node.fit_parameters(pd.DataFrame.from_records(self.data_dict))
+
+        self.assertEqual(self.node.choose_batch(params, pvals).shape, (10,))
+        predictions = self.node.predict_batch(params, pvals)
+        self.assertAlmostEqual(
+            predictions[0], self.node.predict(params, list(pvals[0])), places=6
+        )
+
+    def test_fit_groups(self):
+        data = pd.DataFrame.from_records(self.data_dict)
+        data = data[(data["node4"] != "cat4") | (data["node5"] != "cat7")]
+        hybcprob = self.node.fit_parameters(data)["hybcprob"]
+        occurred = set(str([a, b]) for a, b in zip(data["node4"], data["node5"]))
+
+        self.assertEqual(set(hybcprob), occurred)
+        self.assertTrue(pd.isna(hybcprob["['cat4', 'cat7']"]["variance"]))
+        self.assertIn("['cat4', 'cat7']", hybcprob)
+        self.assertTrue(
+            np.isnan(
+                self.node.predict({"hybcprob": hybcprob}, [1.05, 1.95, "cat4", "cat7"])
+            )
+        )
+        self.assertRaises(KeyError, hybcprob.__getitem__, "['cat4', 'bad']")
+
 
 class TestMixtureGaussianNode(unittest.TestCase):
     def setUp(self):
@@ -381,6 +474,73 @@ class TestMixtureGaussianNode(unittest.TestCase):
 
         self.assertTrue(isinstance(self.node.predict(params, pvals), float))
 
+    def test_batch(self):
+        pvals = np.array([[1.05, 1.95], [0.5, 2.05]] * 5, dtype=object)
+        params = self.node.fit_parameters(pd.DataFrame.from_records(self.data_dict))
+
+        self.assertFalse(np.isnan(self.node.choose_batch(params, pvals)).any())
+        predictions = self.node.predict_batch(params, pvals)
+        self.assertAlmostEqual(
+            predictions[1], self.node.predict(params, list(pvals[1])), places=6
+        )
+
+    def test_static_methods(self):
+        pvals = [1.05, 1.95]
+        params = self.node.fit_parameters(pd.DataFrame.from_records(self.data_dict))
+        compiled = self.node.compiled_mixture(params)
+        node_class = mixture_gaussian_node.MixtureGaussianNode
+
+        for left, right in zip(
+            node_class.get_dist(params, pvals),
+            node_class.get_dist(params, pvals, compiled=compiled),
+        ):
+            np.testing.assert_allclose(left, right)
+        self.assertAlmostEqual(
+            node_class.predict(params, pvals),
+            self.node.predict(params, pvals, compiled=compiled),
+        )
+
+    def test_mixture_components(self):
+        rng = np.random.default_rng(0)
+        x = np.concatenate(
+            [rng.normal(-5, 1, 100), rng.normal(0, 1, 100), rng.normal(5, 1, 100)]
+        )[:, None]
+
+        # one model per number of components, as component(..., "aic"/"bic") did
+        scores = {"aic": [], "bic": []}
+        for n in range(1, 11):
+            model = GaussianMixture(n_components=n, random_state=0).fit(x)
+            scores["aic"].append(model.aic(x))
+            scores["bic"].append(model.bic(x))
+        expected = {
+            method: int(np.argmin(values)) + 1 for method, values in scores.items()
+        }
+
+        for n_jobs in (None, 2):
+            best, models = mixture_components(x, n_jobs=n_jobs)
+            self.assertEqual(best, expected)
+            self.assertEqual(sorted(models), list(range(1, 11)))
+
+    def test_mixture_patience(self):
+        x = np.random.default_rng(0).normal(0, 1, (200, 1))
+        best, models = mixture_components(x)
+        early_best, early_models = mixture_components(x, patience=2)
+        self.assertEqual(early_best, best)
+        self.assertLess(len(early_models), len(models))
+
+        self.node.patience = 2
+        self.node.n_jobs = 2
+        params = self.node.fit_parameters(pd.DataFrame.from_records(self.data_dict))
+        self.assertAlmostEqual(sum(params["coef"]), 1, delta=1e-5)
+
+    def test_fit_mixture_warm_start(self):
+        x = np.random.default_rng(0).normal(0, 1, (200, 2))
+        model = select_mixture(x)
+        gmm = fit_mixture(x, n_iter=0)
+        np.testing.assert_allclose(gmm.means, model.means_)
+        np.testing.assert_allclose(gmm.covariances, model.covariances_)
+        np.testing.assert_allclose(gmm.priors, model.weights_)
+
 
 class TestConditionalMixtureGaussianNode(unittest.TestCase):
     def setUp(self):
@@ -426,6 +586,25 @@ class TestConditionalMixtureGaussianNode(unittest.TestCase):
 
         self.assertTrue(isinstance(self.node.predict(params, pvals), float))
 
+    def test_static_methods(self):
+        pvals = [1.05, 1.95, "cat4", "cat7"]
+        data = pd.DataFrame.from_records(self.data_dict)
+        data.loc[:9, ["node4", "node5"]] = ["cat4", "cat7"]
+        params = self.node.fit_parameters(data)
+        key = str(["cat4", "cat7"])
+        compiled = self.node.compiled_mixture(key, params["hybcprob"][key])
+        node_class = conditional_mixture_gaussian_node.ConditionalMixtureGaussianNode
+
+        for left, right in zip(
+            node_class.get_dist(params, pvals),
+            node_class.get_dist(params, pvals, compiled=compiled),
+        ):
+            np.testing.assert_allclose(left, right)
+        self.assertAlmostEqual(
+            node_class.predict(params, pvals),
+            self.node.predict(params, pvals, compiled=compiled),
+        )
+
 
 class TestLogitNode(unittest.TestCase):
     def setUp(self):
@@ -459,6 +638,15 @@ class TestLogitNode(unittest.TestCase):
 
         self.assertTrue([self.node.predict(params, pvals) in params["classes"]])
 
+    def test_batch(self):
+        pvals = np.array([[1.05, 1.95], [0.5, 2.05]] * 5, dtype=object)
+        params = self.node.fit_parameters(pd.DataFrame.from_records(self.data_dict))
+
+        values = self.node.choose_batch(params, pvals)
+        self.assertTrue(all(value in params["classes"] for value in values))
+        predictions = self.node.predict_batch(params, pvals)
+        self.assertEqual(predictions[0], self.node.predict(params, list(pvals[0])))
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)